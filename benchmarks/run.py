@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+(c) Tuomas Laakkonen 2015, under the MIT license.
+
+benchmarks/run.py
+
+Runs the Pyre benchmarks and compares them with a saved baseline.
+
+Every benchmark is a .pyr file in this directory, except 'parse', which times
+parsing all of them (and the examples and standard library) at once. Each run
+happens in a fresh process, after the standard library is loaded. The best of
+a number of runs is taken as the time, and the peak of Python memory allocated
+while it runs is measured with tracemalloc in one more run. The output of each
+benchmark is recorded too, so that a change in behaviour is noticed as well as
+a change in speed.
+
+    python benchmarks/run.py --save baseline.json      # before a change
+    python benchmarks/run.py --compare baseline.json   # after it
+
+With --compare, the exit status is 1 if any benchmark got slower or used more
+memory than the threshold allows, or printed something different. Comparing a
+baseline saved with --no-opt checks that the optimizer changes no output.
+"""
+
+from argparse import ArgumentParser, SUPPRESS
+from contextlib import redirect_stdout
+import glob
+import hashlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(os.path.dirname(HERE), 'src')
+
+
+def benchmark_names():
+    names = sorted(os.path.basename(path)[:-4] for path in glob.glob(os.path.join(HERE, '*.pyr')))
+    return names + ['parse']
+
+
+def _parse_source():
+    """The source parsed by the parse benchmark: every Pyre file we have, in one block."""
+    paths = sorted(glob.glob(os.path.join(HERE, '*.pyr')) +
+                   glob.glob(os.path.join(HERE, '..', 'examples', '*.pyr')) +
+                   glob.glob(os.path.join(SRC, 'pyre', 'stdlib', '*.pyr')))
+    sources = []
+    for path in paths:
+        with open(path) as f:
+            sources.append(f.read())
+    return 'do\n%s\nend' % '\n'.join(sources * 4)
+
+
+def worker(name, evaluator, backend, memory, optimize):
+    """Run one benchmark in this process, printing its result as JSON."""
+    sys.path.insert(0, SRC)
+    sys.setrecursionlimit(10000)
+    from pyre.runtime import global_state, load_stdlib, pyre_run, set_evaluator, set_optimize
+    from pyre.parser import parse, set_backend
+    from pyre.cache import parse_file
+    set_evaluator(evaluator)
+    set_optimize(optimize)
+    set_backend(backend)
+    load_stdlib()
+    if name == 'parse':
+        source = _parse_source()
+        run = lambda: parse(source)
+    else:
+        tree = parse_file(os.path.join(HERE, name + '.pyr'))
+        run = lambda: pyre_run(tree, global_state.scope_down())
+    output = io.StringIO()
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with redirect_stdout(output):
+        run()
+    elapsed = time.perf_counter() - start
+    result = {'time': elapsed,
+              'output': hashlib.sha1(output.getvalue().encode()).hexdigest()[:12]}
+    if memory:
+        result['memory'] = tracemalloc.get_traced_memory()[1]
+    print(json.dumps(result))
+
+
+def measure(name, evaluator, backend, repeat, optimize=True):
+    """Run a benchmark repeat times in new processes, and once more for its memory."""
+    def once(memory):
+        command = [sys.executable, os.path.abspath(__file__), '--worker', name, evaluator, backend]
+        if memory:
+            command.append('--memory')
+        if not optimize:
+            command.append('--no-opt')
+        proc = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              universal_newlines=True)
+        if proc.returncode != 0:
+            raise RuntimeError('%s failed:\n%s' % (name, proc.stderr))
+        return json.loads(proc.stdout.splitlines()[-1])
+
+    runs = [once(False) for _ in range(repeat)]
+    times = [run['time'] for run in runs]
+    return {
+        'time': min(times),
+        'median': statistics.median(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'memory': once(True)['memory'],
+        'output': runs[0]['output']
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print how results differ from baseline, returning the number of regressions."""
+    regressions = 0
+    print('\n%-32s %10s %10s %8s %8s' % ('benchmark', 'base s', 'now s', 'time', 'memory'))
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print('%-32s %10s %10.4f %8s %8s' % (key, '-', result['time'], 'new', ''))
+            continue
+        time_ratio = result['time'] / base['time']
+        memory_ratio = result['memory'] / base['memory'] if base['memory'] else 1.0
+        notes = []
+        if time_ratio > 1 + threshold:
+            notes.append('SLOWER')
+        if memory_ratio > 1 + threshold:
+            notes.append('MORE MEMORY')
+        if result['output'] != base['output']:
+            notes.append('OUTPUT CHANGED')
+        regressions += bool(notes)
+        print('%-32s %10.4f %10.4f %7.2fx %7.2fx  %s' % (
+            key, base['time'], result['time'], time_ratio, memory_ratio, ' '.join(notes)))
+    return regressions
+
+
+def main(argv):
+    parser = ArgumentParser(description='Run the Pyre benchmarks.')
+    parser.add_argument('names', nargs='*', help='the benchmarks to run (default: all)')
+    parser.add_argument('-e', '--evaluator', default='ast,vm',
+                        help='comma separated evaluators to run under (default: ast,vm)')
+    parser.add_argument('-p', '--parser', default='fast',
+                        help='comma separated parsers to use (default: fast)')
+    parser.add_argument('-n', '--repeat', type=int, default=5,
+                        help='how many times to run each benchmark (default: 5)')
+    parser.add_argument('--no-opt', action='store_true',
+                        help="run the benchmarks without optimizing them")
+    parser.add_argument('--save', metavar='FILE', help='save the results as a baseline')
+    parser.add_argument('--compare', metavar='FILE', help='compare the results with a baseline')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='the slowdown or memory growth counted as a regression (default: 0.1)')
+    parser.add_argument('--worker', nargs=3, help=SUPPRESS)
+    parser.add_argument('--memory', action='store_true', help=SUPPRESS)
+    args = parser.parse_args(argv[1:])
+
+    if args.worker:
+        worker(*args.worker, memory=args.memory, optimize=not args.no_opt)
+        return 0
+
+    names = args.names or benchmark_names()
+    evaluators = args.evaluator.split(',')
+    results = {}
+    print('%-32s %10s %10s %10s %12s' % ('benchmark', 'best s', 'median s', 'stdev', 'peak KB'))
+    for name in names:
+        for backend in args.parser.split(','):
+            # Parsing does not depend on the evaluator.
+            for evaluator in evaluators[:1] if name == 'parse' else evaluators:
+                key = '%s/%s/%s' % (name, evaluator if name != 'parse' else '-', backend)
+                result = results[key] = measure(name, evaluator, backend, args.repeat,
+                                                     not args.no_opt)
+                print('%-32s %10.4f %10.4f %10.4f %12d' % (
+                    key, result['time'], result['median'], result['stdev'],
+                    result['memory'] // 1024))
+                sys.stdout.flush()
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python': platform.python_version(), 'results': results},
+                      f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -4,7 +4,8 @@
 pyre.asteval
 
 A simple implementation of pyre_eval and the surrounding machinery
-which directly evaluates the AST.
+which directly evaluates the AST. Calls in tail position of a function body
+are made by the function's caller, so they do not grow the Python stack.
 
 DEPRECATED:
 Will eventually be replaced by a VM and bytecode compiler.
@@ -19,6 +20,7 @@ from pyre.parser import (
     Number,
     String,
     Block,
+    Seq,
     VarExpr,
     WhileExpr,
     DefExpr,
@@ -27,140 +29,62 @@ from pyre.parser import (
     BreakExpr,
     ForExpr,
     ModuleExpr)
+from pyre.resolver import resolve
 from pyre.objspace import *
 from pyre.util import *
 from functools import partial
 import inspect
 
-from pyre.objspace import *
-from pyre.asteval import *
-
-def pyre_truthy(expr):
-    """Evaluate the truthiness of a value. Everything except 0 (and thus False) is True."""
-    if isinstance(expr, PyreNumber) and expr.value == 0:
-        return False
-    return True
-
-def pyre_call(expr, args):
-    """Implements the call operator via the __call__ special method.
-       This is expected to return a *Python* callable."""
-    return pyre_getattr(expr, '__call__')(*args)
-
-def pyre_getattr(expr, attr):
-    """Implements the dot operator. It first attempts to find the __getallattr__ method,
-       Which is called to find any attribute. Then, it checks the object's dictionary
-       and then if the attribute is not found their, it calls the __getattr__ method."""
-    if pyre_hasattr(expr, '__getallattr__'):
-        return pyre_call(expr.dict['__getallattr__'], attr)
-    elif pyre_hasattr(expr, attr):
-        return expr.dict[attr]
-    elif pyre_hasattr(expr, '__getattr__'):
-        return pyre_call(expr.dict['__getattr__'], attr)
-    else:
-        raise AttributeError(
-            'object "%s" has no attribute "%s"!' % (expr, attr))
-
-def pyre_hasattr(expr, attr):
-    """Checks if an attribute exists in an objects dictionary."""
-    return attr in expr.dict
-
-class _empty: pass
-
-def pyre_to_py_val(expr):
-    """Convert a Pyre value to a Python one. Has direct conversion for some types
-       It then falls back to constructing a object."""
-    if expr == PyreNumber(1):
-        return True
-    elif expr == PyreNumber(0):
-        return False
-    elif expr is Pyre_NONE:
-        return None
-    elif isinstance(expr, PyreNumber):
-        if int(expr.value) == expr.value:
-            return int(expr.value)
-        else:
-            return expr.value
-    elif isinstance(expr, PyreString):
-        return expr.value.encode().decode("unicode_escape")
-    elif isinstance(expr, PyreBytes):
-        return expr.value.decode("unicode_escape").encode()
-    elif isinstance(expr, (PyreList)):
-        return tuple(pyre_to_py_val(x) for x in expr.values)
-    elif isinstance(expr, (PyrePyFunc)):
-        return expr.dict['__call__']
-    elif isinstance(expr, PyreBuffer):
-        return expr.value
-    elif isinstance(expr, PyreObject):
-        obj = _empty()
-        for name, val in expr.dict.items():
-            setattr(obj, name, pyre_to_py_val(val))
-        return obj
-
-def pyre_to_pyre_val(val):
-    """Convert a Python value to a Python one. Has direct conversion for some types
-       It then falls back to constructing a PyreObject."""
-    if callable(val):
-        def _wrapper(*args, **kwargs):
-            return pyre_to_pyre_val(val(*list(map(pyre_to_py_val, args), **kwargs)))
-        return PyrePyFunc(_wrapper)
-    elif val is True:
-        return Pyre_TRUE
-    elif val is False:
-        return Pyre_FALSE
-    elif val is None:
-        return Pyre_NONE
-    elif isinstance(val, str):
-        return PyreString(val)
-    elif isinstance(val, bytes):
-        return PyreBytes(val)
-    elif isinstance(val, (int, float)):
-        return PyreNumber(float(val))
-    elif isinstance(val, io.IOBase):
-        return PyreBuffer(val)
-    elif isinstance(val, collections.Iterable):
-        return PyreList([pyre_to_pyre_val(v) for v in val])
-    else:
-        obj = PyreObject()
-        names = [name for name in dir(val) if not name.startswith('__')]
-        for name, val in zip(names, map(partial(getattr, val), names)):
-            obj._setattr(PyreString(name), pyre_to_pyre_val(val))
-        return obj
-
-def pyre_iter(obj):
-    _next = pyre_call(pyre_getattr(obj, "__iter__"), [])
-    while True:
-        try:
-            yield pyre_call(_next, [])
-        except Exception as e:
-            if str(e) != "stopiter":
-                raise
-            break
-
 class StateDict:
+    """A dynamic scope: a dictionary of variables falling back to a parent scope.
+       The chain of StateDicts ends in a plain dictionary, its root. Lookups walk
+       the chain iteratively, and assignments go to the root if it already has
+       the name, else to this scope. globals is the scope of the program being
+       evaluated, which pyre_eval sets."""
 
     def __init__(self, parent):
         self.items = {}
         self.parent = parent
+        if isinstance(parent, StateDict):
+            self.root, self.globals = parent.root, parent.globals
+        else:
+            self.root, self.globals = parent, self
+
+    def cell(self, name):
+        """The cell of a variable, or None if it is not bound."""
+        scope = self
+        while type(scope) is StateDict:
+            if name in scope.items:
+                return scope.items[name]
+            scope = scope.parent
+        return scope.get(name)
 
     def __getitem__(self, name):
-        if name in self.items:
-            return self.items[name]
-        else:
-            return self.parent[name]
+        scope = self
+        while type(scope) is StateDict:
+            if name in scope.items:
+                return scope.items[name]
+            scope = scope.parent
+        return scope[name]
 
     def __contains__(self, name):
-        return name in self.items or name in self.parent
+        scope = self
+        while type(scope) is StateDict:
+            if name in scope.items:
+                return True
+            scope = scope.parent
+        return name in scope
 
     def keys(self):
-        return self.parent.keys()
+        return self.root.keys()
 
     def update(self, other):
         for k, v in other.items():
             self[k] = v
 
     def __setitem__(self, name, value):
-        if name in self.parent.keys():
-            self.parent[name] = value
+        if name in self.root:
+            self.root[name] = value
         else:
             self.items[name] = value
 
@@ -186,103 +110,326 @@ class State:
 
 
 class BreakError(Exception):
+    """Raised when a break escapes the function it is in."""
     pass
 
 
-class ReturnError(Exception):
+class Signal:
+    """The result of a return or break. Instead of being raised, it is passed
+       up as the value of each enclosing expression until the function or loop
+       it applies to consumes it."""
+    __slots__ = ('value',)
 
-    def __init__(self, value):
+    def __init__(self, value=None):
         self.value = value
 
+BREAK = Signal()
+
+
+class Function:
+    """The Python callable of a function defined in Pyre. Its body is evaluated
+       below env, a scope holding only the cells of the variables of enclosing
+       scopes it captures (see pyre.resolver), in front of the program's global
+       scope; a function which captures nothing has no scope of its own. The
+       captured variables that were not yet bound when it was defined (such as
+       the function itself, if it is recursive) are looked up in the scope it was
+       defined in, outer, when it is called, which is let go once they all are."""
+    __slots__ = ('expr', 'env', 'outer', 'pending')
+
+    def __init__(self, expr, state):
+        self.expr = expr
+        self.outer = None
+        self.pending = []
+        if expr.captures is None:
+            # Not resolved, so keep the whole scope.
+            self.env = state
+            return
+        locals = state.locals
+        env = StateDict(locals.globals) if expr.captures else locals.globals
+        for name in expr.captures:
+            cell = locals.cell(name)
+            if cell is None:
+                self.pending.append(name)
+            else:
+                env.items[name] = cell
+        self.env = State(None, env)
+        if self.pending:
+            self.outer = state
+
+    def resolve(self):
+        """Look up the captured variables which were not bound when the function was defined."""
+        locals = self.outer.locals
+        pending = []
+        for name in self.pending:
+            cell = locals.cell(name)
+            if cell is None:
+                pending.append(name)
+            else:
+                self.env.locals.items[name] = cell
+        self.pending = pending
+        if not pending:
+            self.outer = None
+
+    def __call__(self, *args):
+        return _call_def(self, args)
+
+
+class TailCall:
+    """A call of a Pyre function in tail position of another. It is returned
+       instead of being made, and made by _call_def once the calling function
+       has been left, so that tail calls run in constant stack space."""
+    __slots__ = ('func', 'args')
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+
 
 def pyre_eval(expr, state):
+    """Evaluate a tree. A return outside of any function ends it with its value.
+       state's variables become the program's globals."""
+    resolve(expr)
+    state.locals.globals = state.locals
+    value = _eval(expr, state)
+    if type(value) is Signal:
+        if value is BREAK:
+            raise BreakError()
+        return value.value
+    return value
+
+
+def _call_def(func, args):
+    """Call a Function with args, making the tail calls it returns in turn."""
+    while True:
+        if func.outer is not None:
+            func.resolve()
+        expr = func.expr
+        if len(args) > len(expr.args):
+            raise TypeError('Too many arguments supplied! Should be %s.' % len(expr.args))
+        if len(args) < len(expr.args):
+            raise TypeError('Not enough arguments supplied!')
+        dstate = func.env.scope_down()
+        for name, arg in zip(expr.args, args):
+            dstate.locals[name] = [False, arg]
+        value = _eval_tail(expr.body, dstate)
+        if type(value) is TailCall:
+            func, args = value.func, value.args
+        elif type(value) is Signal:
+            if value is BREAK:
+                raise BreakError()
+            return value.value
+        else:
+            return value
+
+
+def _eval_tail(expr, state):
+    """Evaluate an expression in tail position of a function body: its body, or
+       the last expression of a block, a Seq or a branch of an if in tail position.
+       Calls of Pyre functions are returned as TailCalls instead of being made.
+       A block in tail position adds its variables to the enclosing scope before
+       the call rather than after it."""
+    t = type(expr)
+    if t is Call:
+        args = []
+        for arg in expr.args:
+            value = _eval(arg, state)
+            if type(value) is Signal:
+                return value
+            args.append(value)
+        stem = expr.value
+        if type(stem) is Attr:
+            obj = _eval(stem.value, state)
+            if type(obj) is Signal:
+                return obj
+            d = obj.dict
+            if not d or '__getallattr__' in d or stem.name not in d:
+                return pyre_call_method(obj, stem.name, args, expr.cache)
+            func = d[stem.name]
+        else:
+            func = _eval(stem, state)
+            if type(func) is Signal:
+                return func
+        if (type(func) is PyrePyFunc and type(func.func) is Function and
+                '__call__' not in func.dict):
+            return TailCall(func.func, args)
+        return pyre_call(func, args)
+    elif t is IfExpr:
+        cond = _eval(expr.cond, state)
+        if type(cond) is Signal:
+            return cond
+        if pyre_truthy(cond):
+            return _eval_tail(expr.body, state)
+        elif expr.elsebody is not None:
+            return _eval_tail(expr.elsebody, state)
+    elif t is Block:
+        newstate = state.scope_down()
+        for e in expr.value[:-1]:
+            value = _eval(e, newstate)
+            if type(value) is Signal:
+                return value
+        value = _eval_tail(expr.value[-1], newstate) if expr.value else None
+        if type(value) is Signal:
+            return value
+        newstate.locals.parent.update(newstate.locals.items)
+        state.locals = newstate.locals.parent
+        return value
+    elif t is Seq:
+        for e in expr.value[:-1]:
+            value = _eval(e, state)
+            if type(value) is Signal:
+                return value
+        return _eval_tail(expr.value[-1], state) if expr.value else None
+    elif t is ReturnExpr:
+        value = _eval_tail(expr.value, state)
+        if type(value) is Signal or type(value) is TailCall:
+            return value
+        return Signal(value)
+    else:
+        return _eval(expr, state)
+
+
+def _eval(expr, state):
     if isinstance(expr, Name):
         try:
             return state.locals[expr.value][1]
         except:
             raise NameError('No such variable "%s"!' % expr.value)
     elif isinstance(expr, Call):
-        args = [pyre_eval(arg, state) for arg in expr.args]
-        stem = pyre_eval(expr.value, state)
+        args = []
+        for arg in expr.args:
+            value = _eval(arg, state)
+            if type(value) is Signal:
+                return value
+            args.append(value)
+        stem = expr.value
+        if type(stem) is Attr:
+            obj = _eval(stem.value, state)
+            if type(obj) is Signal:
+                return obj
+            return pyre_call_method(obj, stem.name, args, expr.cache)
+        stem = _eval(stem, state)
+        if type(stem) is Signal:
+            return stem
         return pyre_call(stem, args)
     elif isinstance(expr, Attr):
-        return pyre_getattr(pyre_eval(expr.value, state), expr.name)
+        value = _eval(expr.value, state)
+        if type(value) is Signal:
+            return value
+        return pyre_getattr(value, expr.name)
     elif isinstance(expr, IfExpr):
-        cond = pyre_eval(expr.cond, state)
+        cond = _eval(expr.cond, state)
+        if type(cond) is Signal:
+            return cond
         if pyre_truthy(cond):
-            return pyre_eval(expr.body, state)
+            return _eval(expr.body, state)
         elif expr.elsebody is not None:
-            return pyre_eval(expr.elsebody, state)
-    elif isinstance(expr, Number):
-        return PyreNumber(expr.value)
-    elif isinstance(expr, String):
-        return PyreString(expr.value)
+            return _eval(expr.elsebody, state)
+    elif isinstance(expr, (Number, String)):
+        if expr.const is None:
+            expr.const = pyre_constant(expr.value)
+        return expr.const
     elif isinstance(expr, Block):
         newstate = state.scope_down()
-        vals = [None] + [pyre_eval(e, newstate) for e in expr.value]
+        value = None
+        for e in expr.value:
+            value = _eval(e, newstate)
+            if type(value) is Signal:
+                return value
         newstate.locals.parent.update(newstate.locals.items)
         state.locals = newstate.locals.parent
-        return vals[-1]
+        return value
+    elif isinstance(expr, Seq):
+        value = None
+        for e in expr.value:
+            value = _eval(e, state)
+            if type(value) is Signal:
+                return value
+        return value
     elif isinstance(expr, WhileExpr):
-        result = []
-        while pyre_truthy(pyre_eval(expr.cond, state)):
+        result = [] if expr.collect else None
+        while True:
+            cond = _eval(expr.cond, state)
+            if type(cond) is Signal:
+                return cond
+            if not pyre_truthy(cond):
+                break
             try:
-                result.append(pyre_eval(expr.body, state))
+                value = _eval(expr.body, state)
             except BreakError:
                 break
-        return PyreList(result)
+            if type(value) is Signal:
+                if value is BREAK:
+                    break
+                return value
+            if result is not None:
+                result.append(value)
+        return PyreList(result) if result is not None else None
     elif isinstance(expr, ForExpr):
-        result = []
+        result = [] if expr.collect else None
+        iterable = _eval(expr.expr, state)
+        if type(iterable) is Signal:
+            return iterable
         newstate = state.scope_down()
-        for x in pyre_iter(pyre_eval(expr.expr, state)):
-            newstate.locals[expr.var.value] = [False, x]
+        name = expr.var.value
+        cell = None
+        for x in pyre_iter(iterable):
+            # The loop keeps one cell for its variable, so that closures
+            # made in its body see it change.
+            if cell is not None and newstate.locals.items.get(name) is cell:
+                cell[1] = x
+            else:
+                cell = [False, x]
+                newstate.locals[name] = cell
             try:
-                result.append(pyre_eval(expr.body, newstate))
+                value = _eval(expr.body, newstate)
             except BreakError:
                 break
+            if type(value) is Signal:
+                if value is BREAK:
+                    break
+                return value
+            if result is not None:
+                result.append(value)
         newstate.locals.parent.update(newstate.locals.items)
         state.locals = newstate.locals.parent
-        return PyreList(result)
+        return PyreList(result) if result is not None else None
     elif isinstance(expr, DefExpr):
-        def _wrapper(*args):
-            if len(args) > len(expr.args):
-                raise TypeError('Too many arguments supplied! Should be %s.' % len(args))
-            args = list(zip(expr.args, args))
-            if len(args) < len(expr.args):
-                raise TypeError('Not enough arguments supplied!')
-            dstate = state.scope_down()
-            for name, arg in args:
-                dstate.locals[name] = [False, arg]
-            try:
-                return pyre_eval(expr.body, dstate)
-            except ReturnError as e:
-                return e.value
-        return PyrePyFunc(_wrapper)
+        func = Function(expr, state)
+        return PyrePyFunc(func, (expr, func.env, None))
     elif isinstance(expr, TryExpr):
         try:
-            return pyre_eval(expr.body, state)
-        except ReturnError:
-            raise
+            return _eval(expr.body, state)
         except BreakError:
             raise
         except BaseException:
-            return pyre_eval(expr.exceptbody, state)
+            return _eval(expr.exceptbody, state)
     elif isinstance(expr, BreakExpr):
-        raise BreakError()
+        return BREAK
     elif isinstance(expr, ReturnExpr):
-        raise ReturnError(pyre_eval(expr.value, state))
+        value = _eval(expr.value, state)
+        if type(value) is Signal:
+            return value
+        return Signal(value)
     elif isinstance(expr, VarExpr):
         if expr.var in state.locals:
             if state.locals[expr.var][0] == True:
-                state.locals[expr.var][1] = pyre_eval(expr.value, state)
+                value = _eval(expr.value, state)
+                if type(value) is Signal:
+                    return value
+                state.locals[expr.var][1] = value
             else:
                 raise NameError("Variable '%s' is immutable!" % expr.var)
         else:
-            state.locals[expr.var] = [expr.mut, pyre_eval(expr.value, state)]
+            value = _eval(expr.value, state)
+            if type(value) is Signal:
+                return value
+            state.locals[expr.var] = [expr.mut, value]
         return state.locals[expr.var][1]
     elif isinstance(expr, ModuleExpr):
         newstate = state.scope_down()
-        body = pyre_eval(expr.body, newstate)
+        body = _eval(expr.body, newstate)
+        if type(body) is Signal:
+            return body
         mod = PyreModule()
         for name, val in newstate.locals.items.items():
             if name in expr.args:
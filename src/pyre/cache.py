@@ -0,0 +1,77 @@
+"""
+(c) Tuomas Laakkonen 2015, under the MIT license.
+
+pyre.cache
+
+A cache of parsed Pyre source files. Trees are kept in memory, keyed on the
+file's path and checked against its mtime and size, and are also pickled into
+a __pyrecache__ directory next to the source, keyed on a hash of its contents,
+so that later processes can skip parsing altogether.
+"""
+
+from pyre.parser import parse
+import hashlib
+import os
+import pickle
+import sys
+
+CACHE_DIR = '__pyrecache__'
+
+# Part of every cache key: change it whenever the AST classes change.
+MAGIC = b'pyre-ast-6'
+
+_trees = {}
+
+
+def cache_path(path, digest):
+    """The path of the on-disk cache entry for a source file with the given digest."""
+    head, tail = os.path.split(path)
+    return os.path.join(head, CACHE_DIR, '%s.%s.pickle' % (tail, digest))
+
+
+def _load(cpath):
+    try:
+        with open(cpath, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+
+
+def _store(path, cpath, tree):
+    if sys.dont_write_bytecode:
+        return
+    try:
+        os.makedirs(os.path.dirname(cpath), exist_ok=True)
+        stale = os.path.basename(path) + '.'
+        for name in os.listdir(os.path.dirname(cpath)):
+            if name.startswith(stale) and name != os.path.basename(cpath):
+                os.remove(os.path.join(os.path.dirname(cpath), name))
+        tmp = '%s.%d.tmp' % (cpath, os.getpid())
+        with open(tmp, 'wb') as f:
+            pickle.dump(tree, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cpath)
+    except OSError:
+        pass
+
+
+def parse_file(path):
+    """Parse a Pyre source file, using the in-memory or on-disk cache when it is up to date."""
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    entry = _trees.get(path)
+    if entry is not None and entry[:2] == (st.st_mtime_ns, st.st_size):
+        return entry[2]
+    with open(path, 'rb') as f:
+        source = f.read()
+    cpath = cache_path(path, hashlib.sha1(MAGIC + source).hexdigest()[:16])
+    tree = _load(cpath)
+    if tree is None:
+        tree = parse(source.decode('utf-8'))
+        _store(path, cpath, tree)
+    _trees[path] = (st.st_mtime_ns, st.st_size, tree)
+    return tree
+
+
+def clear():
+    """Forget every tree cached in memory."""
+    _trees.clear()
@@ -0,0 +1,324 @@
+"""
+(c) Tuomas Laakkonen 2015, under the MIT license.
+
+pyre.compiler
+
+A compiler from the Pyre AST into a compact bytecode for the stack VM
+implemented in pyre.vm. Each function body (and the toplevel program) is
+compiled into its own Code object, which is a flat list of (opcode, argument)
+pairs. Jumps are absolute indices into that list. Variables are resolved
+to frame slots by pyre.resolver before compiling. Calls in tail position of a
+function body, its body itself or the last expression of a block or a branch
+of an if in tail position, are compiled to the TAIL_CALL instructions.
+"""
+
+from pyre.parser import (
+    Name,
+    Call,
+    Attr,
+    IfExpr,
+    Number,
+    String,
+    Block,
+    Seq,
+    VarExpr,
+    WhileExpr,
+    DefExpr,
+    TryExpr,
+    ReturnExpr,
+    BreakExpr,
+    ForExpr,
+    ModuleExpr)
+from pyre.objspace import pyre_constant
+from pyre.resolver import resolve
+
+OPNAMES = [
+    'CONST',        # push the constant arg
+    'NONE',         # push None (the value of an if without an else)
+    'LOAD_FAST',    # push the variable in slot arg[0] of the current frame
+    'LOAD_DEREF',   # push the variable in slot arg[1] of the frame arg[0] levels up
+    'LOAD_GLOBAL',  # push the global variable named arg
+    'LET',          # bind or rebind the variable arg = (slot, ref, mut) to TOS
+    'ATTR',         # replace TOS with its attribute arg
+    'CALL',         # pop the stem and arg arguments, push the call result
+    'CALL_METHOD',  # pop an object and arg[1] arguments, push the result of calling
+                    # its method arg[0]; arg[2] is the call site's method cache
+    'POP',          # discard TOS
+    'JUMP',         # jump to arg
+    'JUMP_IF_FALSE',  # pop TOS, jump to arg if it is falsy
+    'FUNCTION',     # push a new function for the Code object arg
+    'RETURN',       # return TOS from the current Code object
+    'BREAK',        # unwind to the innermost loop and jump to its exit
+    'BREAK_RAISE',  # break outside of any loop in this Code object
+    'SETUP_LOOP',   # push a loop block which exits to arg
+    'SETUP_TRY',    # push a try block whose handler is at arg
+    'POP_BLOCK',    # pop the innermost loop or try block
+    'NEW_LIST',     # push an empty PyreList to accumulate loop results into
+    'APPEND',       # pop TOS and append it to the result list at stack[-arg]
+    'GET_ITER',     # replace TOS with an iterator over it
+    'FOR_ITER',     # push the next value of the iterator at TOS or jump to arg
+    'FOR_VAR',      # bind the loop variable in slot arg to TOS, popping it
+    'MODULE',       # run the module body arg = (code, exports), pushing the module
+    'TAIL_CALL',    # CALL in tail position: a Pyre function replaces the current frame
+    'TAIL_CALL_METHOD',  # CALL_METHOD in tail position
+]
+
+for _i, _name in enumerate(OPNAMES):
+    globals()[_name] = _i
+
+
+class Code:
+    """A unit of compiled bytecode: a toplevel program, a module or a function body.
+       names lists the variables in its frame, in slot order starting from 1.
+       For a function body, captures lists the slots it captures from each
+       enclosing frame, innermost first, with the size of a copy of that frame
+       holding them."""
+
+    def __init__(self, name, scope, args=()):
+        self.name = name
+        self.args = list(args)
+        self.names = list(scope.names)
+        self.ops = []
+        self.node = None
+        self.captures = ()
+
+    def emit(self, op, arg=None):
+        self.ops.append((op, arg))
+        return len(self.ops) - 1
+
+    def patch(self, index, target=None):
+        """Set the argument of the jump at index to target, or to the next instruction."""
+        self.ops[index] = (self.ops[index][0], self.here() if target is None else target)
+
+    def here(self):
+        return len(self.ops)
+
+    def __repr__(self):
+        return '<code %s>' % self.name
+
+
+def dis(code, indent=''):
+    """Print a human readable listing of a Code object and the functions nested in it."""
+    print('%s%r (%s)' % (indent, code, ', '.join(code.args)))
+    for i, (op, arg) in enumerate(code.ops):
+        print('%s%4d %-14s %s' % (indent, i, OPNAMES[op], '' if arg is None else arg))
+        if op == FUNCTION:
+            dis(arg, indent + '    ')
+        elif op == MODULE:
+            dis(arg[0], indent + '    ')
+
+
+class Compiler:
+    """Compiles one Code object. Nested functions are compiled by child compilers."""
+
+    def __init__(self, code):
+        self.code = code
+        self.loops = 0
+        self.dispatch = {
+            Name: self.compile_name,
+            Call: self.compile_call,
+            Attr: self.compile_attr,
+            IfExpr: self.compile_if,
+            Number: self.compile_const,
+            String: self.compile_const,
+            Block: self.compile_block,
+            Seq: self.compile_block,
+            VarExpr: self.compile_var,
+            WhileExpr: self.compile_while,
+            ForExpr: self.compile_for,
+            DefExpr: self.compile_def,
+            TryExpr: self.compile_try,
+            BreakExpr: self.compile_break,
+            ReturnExpr: self.compile_return,
+            ModuleExpr: self.compile_module,
+        }
+
+    def compile(self, expr):
+        try:
+            method = self.dispatch[type(expr)]
+        except KeyError:
+            raise TypeError("Can't compile object of type '%s'!" %
+                            type(expr).__name__)
+        method(expr)
+
+    def compile_name(self, expr):
+        chain = expr.ref.chain
+        if not chain:
+            self.code.emit(LOAD_GLOBAL, expr.value)
+        elif chain[0][0] == 0:
+            self.code.emit(LOAD_FAST, (chain[0][1], expr.ref))
+        else:
+            self.code.emit(LOAD_DEREF, (chain[0][0], chain[0][1], expr.ref))
+
+    def compile_const(self, expr):
+        if expr.const is None:
+            expr.const = pyre_constant(expr.value)
+        self.code.emit(CONST, expr.const)
+
+    def compile_tail(self, expr):
+        """Compile an expression in tail position of a function body."""
+        if type(expr) is Call:
+            self.compile_call(expr, True)
+        elif type(expr) is IfExpr:
+            self.compile_if(expr, True)
+        elif type(expr) is Block or type(expr) is Seq:
+            self.compile_block(expr, True)
+        elif type(expr) is ReturnExpr:
+            self.compile_tail(expr.value)
+            self.code.emit(RETURN)
+        else:
+            self.compile(expr)
+
+    def compile_call(self, expr, tail=False):
+        for arg in expr.args:
+            self.compile(arg)
+        if isinstance(expr.value, Attr):
+            self.compile(expr.value.value)
+            self.code.emit(TAIL_CALL_METHOD if tail else CALL_METHOD,
+                           (expr.value.name, len(expr.args), [(None, None)]))
+        else:
+            self.compile(expr.value)
+            self.code.emit(TAIL_CALL if tail else CALL, len(expr.args))
+
+    def compile_attr(self, expr):
+        self.compile(expr.value)
+        self.code.emit(ATTR, expr.name)
+
+    def compile_if(self, expr, tail=False):
+        branch = self.compile_tail if tail else self.compile
+        self.compile(expr.cond)
+        to_else = self.code.emit(JUMP_IF_FALSE)
+        branch(expr.body)
+        to_end = self.code.emit(JUMP)
+        self.code.patch(to_else)
+        if expr.elsebody is not None:
+            branch(expr.elsebody)
+        else:
+            self.code.emit(NONE)
+        self.code.patch(to_end)
+
+    def compile_block(self, expr, tail=False):
+        if not expr.value:
+            self.code.emit(NONE)
+        for i, e in enumerate(expr.value):
+            if i != len(expr.value) - 1:
+                self.compile(e)
+                self.code.emit(POP)
+            elif tail:
+                self.compile_tail(e)
+            else:
+                self.compile(e)
+
+    def compile_var(self, expr):
+        self.compile(expr.value)
+        self.code.emit(LET, (expr.ref.chain[0][1], expr.ref, expr.mut))
+
+    def compile_while(self, expr):
+        if expr.collect:
+            self.code.emit(NEW_LIST)
+        setup = self.code.emit(SETUP_LOOP)
+        top = self.code.here()
+        self.compile(expr.cond)
+        to_exit = self.code.emit(JUMP_IF_FALSE)
+        self.loops += 1
+        self.compile(expr.body)
+        self.loops -= 1
+        if expr.collect:
+            self.code.emit(APPEND, 1)
+        else:
+            self.code.emit(POP)
+        self.code.emit(JUMP, top)
+        self.code.patch(to_exit)
+        self.code.emit(POP_BLOCK)
+        self.code.patch(setup)
+        if not expr.collect:
+            self.code.emit(NONE)
+
+    def compile_for(self, expr):
+        if expr.collect:
+            self.code.emit(NEW_LIST)
+        self.compile(expr.expr)
+        self.code.emit(GET_ITER)
+        setup = self.code.emit(SETUP_LOOP)
+        top = self.code.emit(FOR_ITER)
+        self.code.emit(FOR_VAR, expr.ref.chain[0][1])
+        self.loops += 1
+        self.compile(expr.body)
+        self.loops -= 1
+        if expr.collect:
+            self.code.emit(APPEND, 2)
+        else:
+            self.code.emit(POP)
+        self.code.emit(JUMP, top)
+        self.code.patch(top)
+        self.code.emit(POP_BLOCK)
+        self.code.patch(setup)
+        self.code.emit(POP)
+        if not expr.collect:
+            self.code.emit(NONE)
+
+    def compile_def(self, expr):
+        self.code.emit(FUNCTION, compile_function(expr))
+
+    def compile_try(self, expr):
+        setup = self.code.emit(SETUP_TRY)
+        self.compile(expr.body)
+        self.code.emit(POP_BLOCK)
+        to_end = self.code.emit(JUMP)
+        self.code.patch(setup)
+        self.compile(expr.exceptbody)
+        self.code.patch(to_end)
+
+    def compile_break(self, expr):
+        self.code.emit(BREAK if self.loops else BREAK_RAISE)
+
+    def compile_return(self, expr):
+        self.compile(expr.value)
+        self.code.emit(RETURN)
+
+    def compile_module(self, expr):
+        code = Code('<module>', expr.scope)
+        Compiler(code).compile(expr.body)
+        code.emit(RETURN)
+        exports = tuple((name, expr.scope.slots[name])
+                        for name in expr.args if name in expr.scope.slots)
+        self.code.emit(MODULE, (code, exports))
+
+
+def capture_plan(expr):
+    """The captures of the Code object for a resolved DefExpr. The frames beyond
+       one declaring a name as an argument are never searched for it, since an
+       argument is always bound, so their declarations are not captured."""
+    levels = {}
+    for name in expr.captures:
+        scope, depth = expr.scope.parent, 0
+        while scope is not None:
+            slot = scope.slots.get(name)
+            if slot is not None:
+                levels.setdefault(depth, set()).add(slot)
+                if slot <= scope.nargs:
+                    break
+            scope, depth = scope.parent, depth + 1
+    if not levels:
+        return ()
+    return tuple((tuple(sorted(levels.get(depth, ()))), max(levels.get(depth, (0,))) + 1)
+                 for depth in range(max(levels) + 1))
+
+
+def compile_function(expr, name='<def>'):
+    """Compile the body of a resolved DefExpr into a Code object."""
+    code = Code(name, expr.scope, expr.args)
+    code.node = expr
+    code.captures = capture_plan(expr)
+    Compiler(code).compile_tail(expr.body)
+    code.emit(RETURN)
+    return code
+
+
+def compile(tree, name='<toplevel>'):
+    """Resolve and compile a whole program, as returned by pyre.parser.parse."""
+    code = Code(name, resolve(tree))
+    code.node = tree
+    Compiler(code).compile(tree)
+    code.emit(RETURN)
+    return code
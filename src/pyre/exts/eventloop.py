@@ -0,0 +1,289 @@
+"""
+(c) Tuomas Laakkonen 2015, under the MIT license.
+
+pyre.exts.eventloop
+
+An event loop for Pyre, built on asyncio. The loop runs in a background thread
+which is started the first time it is needed, and every callback given to it is
+called on that thread, one at a time. This lets one Pyre program wait on many
+sockets, files and timers at once without a thread for each of them.
+"""
+
+from pyre.objspace import (
+    PyreObject,
+    PyreBuffer,
+    PyreBytes,
+    PyreString,
+    PyreList,
+    Pyre_TRUE,
+    Pyre_FALSE,
+    pyre_call,
+    pyre_number,
+    pyre_setattr,
+    method_table)
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import builtins
+import threading
+import traceback
+
+_loop = None
+_thread = None
+_stopped = threading.Event()
+
+
+def _get_loop():
+    global _loop, _thread
+    if _loop is None or not _thread.is_alive():
+        _loop = asyncio.new_event_loop()
+        _thread = threading.Thread(target=_loop.run_forever, daemon=True)
+        _stopped.clear()
+        _thread.start()
+    return _loop
+
+
+def _in_loop(func, *args):
+    """Call func on the loop thread: now if this is it or the loop has stopped,
+       or else as soon as possible."""
+    if _thread is None or not _thread.is_alive() or threading.current_thread() is _thread:
+        func(*args)
+    else:
+        _loop.call_soon_threadsafe(func, *args)
+
+
+def _wait_for(coro):
+    """Run a coroutine on the loop, waiting for its result unless this is the loop thread."""
+    loop = _get_loop()
+    if threading.current_thread() is _thread:
+        return loop.create_task(coro)
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def _callback(func, args):
+    """Call a Pyre callback, reporting errors instead of letting them reach asyncio."""
+    try:
+        pyre_call(func, args)
+    except Exception:
+        traceback.print_exc()
+
+
+def _to_bytes(data):
+    return data.value.encode() if isinstance(data, PyreString) else data.value
+
+
+class PyreStream(PyreBuffer):
+    """A Pyre object that represents a socket connection. Its value is the asyncio transport.
+       Callbacks registered with on are called with each chunk of data received ('data'),
+       each complete line of text received ('line') and when the connection closes ('close')."""
+    __slots__ = ('handlers', 'pending')
+
+    def __init__(self, transport):
+        super().__init__(transport)
+        self.handlers = {}
+        self.pending = b''
+        peer = transport.get_extra_info('peername')
+        if peer is not None:
+            pyre_setattr(self, 'address', PyreList(
+                [PyreString(str(peer[0])), pyre_number(peer[1])]))
+
+    def _trigger(self, name, value):
+        for func in self.handlers.get(name, ()):
+            _callback(func, [value])
+
+    def _received(self, data):
+        self._trigger('data', PyreBytes(data))
+        if 'line' in self.handlers:
+            lines = (self.pending + data).split(b'\n')
+            self.pending = lines.pop()
+            for line in lines:
+                self._trigger('line', PyreString((line + b'\n').decode(errors='replace')))
+
+    def on(self, name, func):
+        self.handlers.setdefault(name.value, []).append(func)
+        return func
+
+    def write(self, data):
+        _in_loop(self.value.write, _to_bytes(data))
+        return data
+
+    def close(self):
+        _in_loop(self.value.close)
+
+    methods = method_table(PyreBuffer.methods, {
+        'on': on,
+        'write': write,
+        'close': close
+    })
+
+
+class _Protocol(asyncio.Protocol):
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.stream = None
+
+    def connection_made(self, transport):
+        self.stream = PyreStream(transport)
+        if self.callback is not None:
+            _callback(self.callback, [self.stream])
+
+    def data_received(self, data):
+        self.stream._received(data)
+
+    def connection_lost(self, exc):
+        self.stream._trigger('close', self.stream)
+
+
+class PyreServer(PyreObject):
+    """A Pyre object that represents a listening socket."""
+    __slots__ = ('server',)
+
+    def __init__(self, server):
+        super().__init__()
+        self.server = server
+
+    def port(self):
+        return pyre_number(self.server.sockets[0].getsockname()[1])
+
+    def close(self):
+        _in_loop(self.server.close)
+
+    methods = method_table(PyreObject.methods, {
+        'port': port,
+        'close': close
+    })
+
+
+class PyreTimer(PyreObject):
+    """A Pyre object that represents a callback scheduled on the loop."""
+    __slots__ = ('func', 'delay', 'repeat', 'handle', 'cancelled')
+
+    def __init__(self, func, delay, repeat):
+        super().__init__()
+        self.func, self.delay, self.repeat = func, delay, repeat
+        self.handle = None
+        self.cancelled = False
+        _in_loop(self._schedule)
+
+    def _schedule(self):
+        if not self.cancelled:
+            self.handle = _loop.call_later(self.delay, self._fire)
+
+    def _fire(self):
+        if self.repeat:
+            self._schedule()
+        _callback(self.func, [])
+
+    def _cancel(self):
+        self.cancelled = True
+        if self.handle is not None:
+            self.handle.cancel()
+
+    def cancel(self):
+        _in_loop(self._cancel)
+
+    methods = method_table(PyreObject.methods, {
+        'cancel': cancel
+    })
+
+
+class PyreAsyncFile(PyreBuffer):
+    """A Pyre object that represents a file whose reads and writes run in the background,
+       in order, calling a callback with their result on the loop thread."""
+    __slots__ = ('executor',)
+
+    def __init__(self, value):
+        super().__init__(value)
+        self.executor = ThreadPoolExecutor(1)
+
+    def _submit(self, func, args, callback):
+        future = self.executor.submit(func, *args)
+        if callback is not None:
+            future.add_done_callback(
+                lambda f: _in_loop(self._done, f, callback))
+
+    def _done(self, future, callback):
+        if future.exception() is not None:
+            traceback.print_exception(future.exception())
+            return
+        value = future.result()
+        if isinstance(value, str):
+            value = PyreString(value)
+        elif isinstance(value, bytes):
+            value = PyreBytes(value)
+        else:
+            value = pyre_number(value)
+        _callback(callback, [value])
+
+    def read(self, n, callback):
+        self._submit(self.value.read, [int(n.value)], callback)
+
+    def readline(self, callback):
+        self._submit(self.value.readline, [], callback)
+
+    def write(self, data, callback=None):
+        self._submit(self.value.write, [data.value], callback)
+        return data
+
+    def close(self, callback=None):
+        self._submit(self.value.close, [], callback)
+        self.executor.shutdown(wait=False)
+
+    methods = method_table(PyreBuffer.methods, {
+        'read': read,
+        'readline': readline,
+        'write': write,
+        'close': close
+    })
+
+
+def listen(host, port, callback):
+    server = _wait_for(_get_loop().create_server(
+        lambda: _Protocol(callback), host.value or None, int(port.value),
+        reuse_address=True))
+    return PyreServer(server) if not isinstance(server, asyncio.Task) else None
+
+
+def connect(host, port, callback):
+    result = _wait_for(_get_loop().create_connection(
+        lambda: _Protocol(callback), host.value, int(port.value)))
+    return result[1].stream if not isinstance(result, asyncio.Task) else None
+
+
+def open(filename, mode):
+    return PyreAsyncFile(builtins.open(filename.value, mode.value))
+
+
+def soon(func, *args):
+    _get_loop().call_soon_threadsafe(_callback, func, list(args))
+
+
+def after(seconds, func):
+    return PyreTimer(func, seconds.value, False)
+
+
+def every(seconds, func):
+    return PyreTimer(func, seconds.value, True)
+
+
+def stop():
+    if _loop is not None:
+        _loop.call_soon_threadsafe(_loop.stop)
+        if threading.current_thread() is not _thread:
+            _thread.join()
+    _stopped.set()
+
+
+def wait():
+    _get_loop()
+    _stopped.wait()
+    # Once wait returns, the loop has stopped, and the next use starts a new one.
+    if threading.current_thread() is not _thread:
+        _thread.join()
+
+
+def running():
+    return Pyre_TRUE if _thread is not None and _thread.is_alive() else Pyre_FALSE
+
+
+__all__ = ['listen', 'connect', 'open', 'soon', 'after', 'every', 'stop', 'wait', 'running']
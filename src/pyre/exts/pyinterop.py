@@ -1,16 +1,17 @@
-from pyre.objspace import pyre_to_pyre_val, pyre_to_py_val, PyreModule, PyreString
-from functools import partial
+from pyre.objspace import (
+    pyre_to_pyre_val,
+    pyre_to_py_val,
+    pyre_module_proxy,
+    PyreList,
+    PyreBytes,
+    PyreArray,
+    PyreProxy,
+    ListView)
+import importlib
 
 def pyimport(name):
     name = pyre_to_py_val(name)
-    pymod = __import__(name)
-    for part in name.split(".")[1:]:
-        pymod = getattr(pymod, part)
-    names = pymod.__all__ if hasattr(pymod, '__all__') else [name for name in dir(pymod) if not name.startswith('__')]
-    mod = PyreModule()
-    for name, value in zip(names, map(partial(getattr, pymod), names)):
-        mod._setattr(PyreString(name), pyre_to_pyre_val(value))
-    return mod
+    return pyre_module_proxy(importlib.import_module(name))
 
 def pyeval(string):
     string = pyre_to_py_val(string)
@@ -22,8 +23,16 @@ def pyexec(string):
     
     
 def apply_kw(func, ad):
-    func, adict = pyre_to_py_val(func), {pyre_to_py_val(name): pyre_to_py_val(value) 
-                for name, value in zip(ad.dict['keys'].values, ad.dict['values'].values)}
-    return pyre_to_pyre_val(func(**adict))
+    return pyre_to_pyre_val(pyre_to_py_val(func)(**pyre_to_py_val(ad)))
 
-__all__ = ['pyimport', 'pyexec', 'pyeval', 'apply_kw']
\ No newline at end of file
+def view(value):
+    """Wrap a list, bytes or an array so that it is passed to Python without being copied."""
+    if isinstance(value, PyreList):
+        return PyreProxy(ListView(value.values))
+    elif isinstance(value, PyreBytes):
+        return PyreProxy(memoryview(value.value))
+    elif isinstance(value, PyreArray):
+        return PyreProxy(value.values)
+    raise TypeError("Can't make a view of '%s'!" % value)
+
+__all__ = ['pyimport', 'pyexec', 'pyeval', 'apply_kw', 'view']
\ No newline at end of file
@@ -1,8 +1,159 @@
-from pyre.objspace import pyre_to_py_val, pyre_to_pyre_val
+"""
+(c) Tuomas Laakkonen 2015, under the MIT license.
+
+pyre.exts.threading
+
+Concurrency for Pyre: threads, thread pools and process pools.
+
+Threads share the interpreter and its global lock, so they suit I/O bound
+work. Process pools run functions in separate interpreters, so CPU bound work
+can use every core; functions and their arguments are sent with pyre.serialize.
+"""
+
+from pyre.objspace import (
+    PyreObject,
+    PyreList,
+    PyrePyFunc,
+    Pyre_TRUE,
+    Pyre_FALSE,
+    pyre_call,
+    pyre_iter,
+    method_table)
+from pyre import runtime, serialize
+from concurrent import futures
 import threading
 
+
+class PyreThread(PyreObject):
+    """A Pyre object that represents a running thread."""
+    __slots__ = ('thread', 'result', 'error')
+
+    def __init__(self, func, args):
+        super().__init__()
+        self.result = self.error = None
+        self.thread = threading.Thread(
+            target=self._run, args=(runtime.current_settings(), func, args), daemon=True)
+        self.thread.start()
+
+    def _run(self, settings, func, args):
+        try:
+            self.result = _call(settings, func, args)
+        except BaseException as e:
+            self.error = e
+
+    def join(self):
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def alive(self):
+        return Pyre_TRUE if self.thread.is_alive() else Pyre_FALSE
+
+    methods = method_table(PyreObject.methods, {
+        'join': join,
+        'alive': alive
+    })
+
+
+class PyreFuture(PyreObject):
+    """A Pyre object that represents the result of a call submitted to a pool."""
+    __slots__ = ('future', 'convert')
+
+    def __init__(self, future, convert=None):
+        super().__init__()
+        self.future = future
+        self.convert = convert
+
+    def result(self):
+        value = self.future.result()
+        return self.convert(value) if self.convert is not None else value
+
+    def done(self):
+        return Pyre_TRUE if self.future.done() else Pyre_FALSE
+
+    def cancel(self):
+        return Pyre_TRUE if self.future.cancel() else Pyre_FALSE
+
+    methods = method_table(PyreObject.methods, {
+        'result': result,
+        'done': done,
+        'cancel': cancel
+    })
+
+
+def _call(settings, func, args):
+    """Call func on another thread with the settings of the one that asked for it."""
+    with runtime.settings(*settings):
+        return pyre_call(func, args)
+
+
+def _init_worker(evaluator, optimizing):
+    runtime.set_evaluator(evaluator)
+    runtime.set_optimize(optimizing)
+    runtime.load_stdlib()
+
+
+def _call_pickled(data):
+    func, args = serialize.loads(data)
+    try:
+        result = pyre_call(func, args)
+    except Exception as e:
+        raise RuntimeError('%s: %s' % (type(e).__name__, e)) from None
+    return serialize.dumps(result)
+
+
+class PyrePool(PyreObject):
+    """A Pyre object that represents a pool of worker threads or processes."""
+    __slots__ = ('executor', 'processes')
+
+    def __init__(self, size, processes=False):
+        super().__init__()
+        self.processes = processes
+        if processes:
+            self.executor = futures.ProcessPoolExecutor(
+                size, initializer=_init_worker, initargs=runtime.current_settings()[:2])
+        else:
+            self.executor = futures.ThreadPoolExecutor(size)
+
+    def _submit(self, func, args):
+        if self.processes:
+            data = serialize.dumps((func, args))
+            return self.executor.submit(_call_pickled, data), serialize.loads
+        return self.executor.submit(_call, runtime.current_settings(), func, args), None
+
+    def submit(self, func, *args):
+        return PyreFuture(*self._submit(func, list(args)))
+
+    def map(self, func, iterable):
+        pending = [self._submit(func, [value]) for value in pyre_iter(iterable)]
+        return PyreList([convert(future.result()) if convert is not None else future.result()
+                         for future, convert in pending])
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+    methods = method_table(PyreObject.methods, {
+        'submit': submit,
+        'map': map,
+        'shutdown': shutdown
+    })
+
+
+def spawn(func, *args):
+    return PyreThread(func, list(args))
+
+
 def run(func, args):
-    func, args = pyre_to_py_val(func), pyre_to_py_val(args)
-    threading.Thread(target=func, args=args, daemon=True).run()
+    return PyreThread(func, list(args.values))
+
+
+def pool(size):
+    return PyrePool(int(size.value))
+
+
+def processes(size):
+    return PyrePool(int(size.value), processes=True)
+
 
-__all__ = ['run']
\ No newline at end of file
+__all__ = ['spawn', 'run', 'pool', 'processes']
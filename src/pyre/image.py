@@ -0,0 +1,81 @@
+"""
+(c) Tuomas Laakkonen 2015, under the MIT license.
+
+pyre.image
+
+Images of a prepared interpreter, which ipyre --image saves once and restores
+at each start instead of preparing the interpreter again. An image holds only
+the modules loaded by import, pickled with pyre.serialize, so that restoring
+it parses and runs no Pyre code. The builtins are not in it: they are pickled
+by name, so the standard library is loaded as usual before an image is
+restored, and the builtins the modules use are looked up in it.
+
+An image records the source file of each module it holds; a module whose file
+has changed since is left out when the image is restored, and is loaded by
+import as usual. An image saved by a different version of Pyre or Python is
+not restored at all, and neither is one which cannot be read.
+"""
+
+from pyre import runtime, serialize
+from pyre.cache import MAGIC
+from pyre.objspace import PyreString, pyre_call
+from pyre.runtime import global_state, load_stdlib
+import os
+import pickle
+import sys
+
+# Part of every image: change it whenever the format of images changes.
+IMAGE_MAGIC = b'pyre-image-3'
+
+
+def _version():
+    return (IMAGE_MAGIC, MAGIC, sys.version_info[:2])
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def save(filename, preload=()):
+    """Load the standard library and the modules named in preload, as import does,
+       and save the result as an image."""
+    load_stdlib()
+    for name in preload:
+        pyre_call(global_state.locals['import'][1], [PyreString(name)])
+    image = {
+        'preload': tuple(preload),
+        'modules': dict(runtime.modules),
+        'stamps': {path: _stamp(path) for path in runtime.modules}
+    }
+    tmp = '%s.%d.tmp' % (filename, os.getpid())
+    with open(tmp, 'wb') as f:
+        pickle.dump(_version(), f, pickle.HIGHEST_PROTOCOL)
+        f.write(serialize.dumps(image))
+    os.replace(tmp, filename)
+
+
+def load(filename, preload=()):
+    """Restore an image saved with the same preload, returning whether it could be."""
+    try:
+        with open(filename, 'rb') as f:
+            if pickle.load(f) != _version():
+                return False
+            data = f.read()
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return False
+    load_stdlib()
+    try:
+        image = serialize.loads(data)
+    except Exception:
+        # A damaged image, or one naming code which has since changed.
+        return False
+    if image['preload'] != tuple(preload):
+        return False
+    for path, module in image['modules'].items():
+        if path not in runtime.modules and _stamp(path) == image['stamps'][path]:
+            runtime.modules[path] = module
+    return True
@@ -0,0 +1,8 @@
+from pyre.runtime import global_state, builtin_func
+from pyre.objspace import PyreDict, pyre_iter
+
+@builtin_func(global_state, 'dict')
+def _dict(state, pairs=None):
+    if pairs is None:
+        return PyreDict()
+    return PyreDict(pyre_iter(pair) for pair in pyre_iter(pairs))
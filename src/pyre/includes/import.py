@@ -1,15 +1,21 @@
-from pyre.runtime import global_state, builtin_func
-from pyre.asteval import pyre_eval
-from pyre.objspace import PyreObject, PyreString
-from pyre.parser import parse, tokenize
+from pyre.runtime import global_state, builtin_func, pyre_run, modules, module_lock
+from pyre.objspace import PyreObject, PyreString, pyre_freeze
+from pyre.cache import parse_file
+import os
 
 @builtin_func(global_state, 'import')
 def _import(state, name):
-	newstate = state.scope_down()
-	try:
-		with open(name.value.replace('.', '/') + '.pyr', 'r') as f:
-			module = pyre_eval(parse(f.read()), newstate)
-	except IOError:
-		with open(__file__[:-10] + '/../stdlib/' + name.value.replace('.', '/') + '.pyr', 'r') as f:
-			module = pyre_eval(parse(f.read()), newstate)
-	return module
\ No newline at end of file
+	path = name.value.replace('.', '/') + '.pyr'
+	if not os.path.exists(path):
+		path = __file__[:-10] + '/../stdlib/' + path
+	path = os.path.abspath(path)
+	module = modules.get(path)
+	if module is None:
+		with module_lock(path):
+			module = modules.get(path)
+			if module is None:
+				module = pyre_run(parse_file(path), state.scope_down())
+				# Modules are shared by every program, so none may change them.
+				pyre_freeze(module)
+				modules[path] = module
+	return module
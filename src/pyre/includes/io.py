@@ -1,12 +1,23 @@
 from pyre.runtime import global_state, builtin_func
-from pyre.objspace import PyreString, PyreObject, PyrePyFunc, PyreBuffer
+from pyre.objspace import PyreString, PyreObject, PyrePyFunc, PyreBuffer, PyreMmap, PyreByteArray, PyreList, PyreArray
 from pyre.asteval import pyre_to_py_val
+import mmap
 import sys
 import os
 
+def _printable(value):
+    """The Python value print shows for a Pyre one. Arrays convert to numpy or
+       array.array values, depending on what is installed, so they, and lists
+       holding them, are shown as lists are instead."""
+    if type(value) is PyreArray:
+        value = value.list()
+    if type(value) is PyreList:
+        return tuple(map(_printable, value.values))
+    return pyre_to_py_val(value)
+
 @builtin_func(global_state, 'print')
 def _print(state, *args):
-    print(*map(pyre_to_py_val, args), flush=True)
+    print(*map(_printable, args), flush=True)
 
 
 @builtin_func(global_state, 'input')
@@ -18,6 +29,19 @@ def _input(state, prompt=PyreString('')):
 def _quit(state):
     sys.exit()
 
+global_state.locals['stdin'] = (False, PyreBuffer(sys.stdin))
+
 @builtin_func(global_state, 'open')
 def _open(state, filename, mode):
-	return PyreBuffer(open(filename.value, mode.value))
\ No newline at end of file
+	return PyreBuffer(open(filename.value, mode.value))
+
+@builtin_func(global_state, 'mmap')
+def _mmap(state, filename, mode=PyreString('r')):
+    writable = '+' in mode.value or 'w' in mode.value
+    with open(filename.value, 'r+b' if writable else 'rb') as f:
+        return PyreMmap(mmap.mmap(f.fileno(), 0,
+                                  access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ))
+
+@builtin_func(global_state, 'bytearray')
+def _bytearray(state, size=None):
+    return PyreByteArray(bytearray(0 if size is None else int(size.value)))
@@ -1,5 +1,5 @@
 from pyre.runtime import global_state, builtin_func
-from pyre.objspace import PyreList, PyreNumber
+from pyre.objspace import PyreList, PyreRange, PyreArray, PyreNumber, pyre_array, pyre_iter, pyre_number
 
 @builtin_func(global_state, 'list')
 def _list(state, *args):
@@ -7,8 +7,18 @@ def _list(state, *args):
 
 @builtin_func(global_state, 'sum')
 def _sum(state, list):
-    return PyreNumber(sum([x.value for x in list.values]))
+    if isinstance(list, PyreArray):
+        return list.sum()
+    return pyre_number(sum(x.value for x in pyre_iter(list)))
+
+@builtin_func(global_state, 'array')
+def _array(state, *args):
+    if len(args) == 1 and not isinstance(args[0], PyreNumber):
+        if isinstance(args[0], PyreRange):
+            return pyre_array(args[0].values)
+        return pyre_array(x.value for x in pyre_iter(args[0]))
+    return pyre_array(x.value for x in args)
 
 @builtin_func(global_state, 'range')
 def _range(state, *args):
-	return PyreList([PyreNumber(x) for x in range(*[int(arg.value) for arg in args])])
\ No newline at end of file
+	return PyreRange(range(*[int(arg.value) for arg in args]))
\ No newline at end of file
@@ -0,0 +1,9 @@
+from pyre.runtime import global_state, builtin_func
+from pyre.objspace import PyreStringBuilder
+
+@builtin_func(global_state, 'builder')
+def _builder(state, *args):
+    builder = PyreStringBuilder()
+    for arg in args:
+        builder.append(arg)
+    return builder
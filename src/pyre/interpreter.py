@@ -0,0 +1,97 @@
+"""
+(c) Tuomas Laakkonen 2015, under the MIT license.
+
+pyre.interpreter
+
+An interface for embedding Pyre in Python programs. An Interpreter loads the
+standard library once, when it is made, and keeps a snapshot of the global
+scope it leaves. Each Context it hands out is a new scope below that snapshot,
+so making one costs next to nothing, and the variables a program declares in
+one context are not seen by programs run in another. Contexts can be used
+from different threads at once.
+
+    interp = Interpreter(evaluator='vm')
+    ctx = interp.context()
+    ctx.set('n', 10)
+    print(ctx.run('n.mul(2)'))
+
+Modules loaded by import are loaded once for the whole process, as they are
+by ipyre, so they are shared by every context. A module is run with the
+settings of the interpreter that imports it first.
+
+What contexts share cannot be changed through them: the builtins and modules
+are frozen, and numbers, strings and None are immutable, so setting an
+attribute on any of them raises an error. Mutable values held by a module,
+such as a list, are still shared.
+"""
+
+from pyre import runtime
+from pyre.runtime import EVALUATORS, global_state, load_stdlib
+from pyre.asteval import State, StateDict
+from pyre.objspace import pyre_to_pyre_val
+from pyre.parser import parse
+from pyre.rdparser import parse_stream
+from pyre.cache import parse_file
+
+
+class Interpreter:
+    """A prepared global scope, and the evaluator and optimizer settings programs
+       are run with. They default to those selected in pyre.runtime."""
+
+    def __init__(self, evaluator=None, optimizing=None):
+        if evaluator is not None and evaluator not in EVALUATORS:
+            raise ValueError("Unknown evaluator '%s'!" % evaluator)
+        load_stdlib()
+        self.evaluator = evaluator if evaluator is not None else runtime.evaluator
+        self.optimizing = optimizing if optimizing is not None else runtime.optimizing
+        self.globals = dict(global_state.locals.root)
+        self.globals.update(global_state.locals.items)
+
+    def context(self):
+        """Make a new, empty scope to run programs in."""
+        return Context(self)
+
+    def run(self, tree, state):
+        """Evaluate a parsed program in state, optimizing it first if enabled. The
+           programs it runs with eval or import use the same settings, and those
+           run by eval see the variables of state."""
+        with runtime.settings(self.evaluator, self.optimizing, state):
+            return runtime.pyre_run(tree, state)
+
+
+class Context:
+    """A scope below an Interpreter's globals. Variables declared by the programs
+       run in it stay in it, so later programs see them, like lines of the REPL."""
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.state = State(None, StateDict(interpreter.globals))
+
+    def run(self, source):
+        """Run a program given as a string, returning its value."""
+        return self.interpreter.run(parse(source), self.state)
+
+    def run_file(self, filename):
+        """Run a program from a file, returning its value."""
+        return self.interpreter.run(parse_file(filename), self.state)
+
+    def run_stream(self, lines):
+        """Run a program given as lines, such as a file, running each of its toplevel
+           expressions as soon as it has been read (see pyre.rdparser.parse_stream)
+           rather than once all of it has been. Returns the value of the last."""
+        value = None
+        for tree in parse_stream(lines):
+            value = self.interpreter.run(tree, self.state)
+        return value
+
+    def get(self, name):
+        """The Pyre value of a variable, raising NameError if it is not bound."""
+        if name not in self.state.locals:
+            raise NameError('No such variable "%s"!' % name)
+        return self.state.locals[name][1]
+
+    def set(self, name, value, mutable=False):
+        """Bind a variable to a value, converting it from Python if it is not a Pyre value."""
+        if name in self.interpreter.globals:
+            raise NameError("Variable '%s' is immutable!" % name)
+        self.state.locals.items[name] = [mutable, pyre_to_pyre_val(value)]
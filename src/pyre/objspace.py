@@ -6,14 +6,29 @@ pyre.objspace
 An implementation of the basic object-space and native Pyre types.
 """
 
-from pyre.asteval import *
 from pyre.util import *
-import collections
+import array
+import collections.abc
 import io
+import itertools
+import math
+import operator
 from functools import partial
+from types import MappingProxyType, ModuleType
 
-from pyre.objspace import *
-from pyre.asteval import *
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# The shared, read-only attribute dictionaries of objects which have never had an
+# attribute set on them, and of shared objects which may never have one.
+# pyre_setattr gives an object with the first its own on first use.
+_NO_ATTRS = MappingProxyType({})
+_FROZEN = MappingProxyType({})
+
+class PyreStopIteration(Exception):
+    """Raised by the next function of an iterator when it is exhausted."""
 
 def pyre_truthy(expr):
     """Evaluate the truthiness of a value. Everything except 0 (and thus False) is True."""
@@ -22,94 +37,297 @@ def pyre_truthy(expr):
     return True
 
 def pyre_call(expr, args):
-    """Implements the call operator via the __call__ special method.
-       This is expected to return a *Python* callable."""
-    return pyre_getattr(expr, '__call__')(*args)
+    """Implements the call operator via the __call__ special method, which may be
+       a Python callable or another Pyre object to call in turn."""
+    if type(expr) is PyrePyFunc and '__call__' not in expr.dict:
+        return expr.func(*args)
+    call = pyre_getattr(expr, '__call__')
+    if callable(call):
+        return call(*args)
+    return pyre_call(call, args)
 
 def pyre_getattr(expr, attr):
     """Implements the dot operator. It first attempts to find the __getallattr__ method,
-       Which is called to find any attribute. Then, it checks the object's dictionary
-       and then if the attribute is not found their, it calls the __getattr__ method."""
-    if pyre_hasattr(expr, '__getallattr__'):
-        return pyre_call(expr.dict['__getallattr__'], attr)
-    elif pyre_hasattr(expr, attr):
-        return expr.dict[attr]
-    elif pyre_hasattr(expr, '__getattr__'):
-        return pyre_call(expr.dict['__getattr__'], attr)
+       Which is called to find any attribute. Then, it checks the object's dictionary,
+       then the method table of its type (binding the method to the object) and
+       then if the attribute is not found their, it calls the __getattr__ method.
+       Objects which have never had an attribute set skip straight to the method table.
+       A property in the method table is not bound, but called to get the attribute."""
+    d = expr.dict
+    if d:
+        if '__getallattr__' in d:
+            return pyre_call(d['__getallattr__'], [PyreString(attr)])
+        elif attr in d:
+            return d[attr]
+    method = expr.methods.get(attr)
+    if method is not None:
+        if type(method) is property:
+            return method.fget(expr)
+        return PyrePyFunc(method.__get__(expr))
+    elif attr == '__call__' and isinstance(expr, PyrePyFunc):
+        return expr.func
+    elif '__getattr__' in d:
+        return pyre_call(d['__getattr__'], [PyreString(attr)])
     else:
         raise AttributeError(
             'object "%s" has no attribute "%s"!' % (expr, attr))
 
+def pyre_call_method(expr, attr, args, cache):
+    """Calls the method attr of expr, like pyre_call(pyre_getattr(expr, attr), args).
+       cache is a one item list belonging to the call site, holding the type and
+       method found by the last call as a pair, which is reused while the receiver
+       is of the same type and has no attributes of its own that could shadow the
+       method. The pair is stored and read in one step, so threads sharing the call
+       site never see the type of one call with the method of another."""
+    if not expr.dict:
+        cls, method = cache[0]
+        if type(expr) is cls:
+            return method(expr, *args)
+        method = expr.methods.get(attr)
+        if method is not None and type(method) is not property:
+            cache[0] = (type(expr), method)
+            return method(expr, *args)
+    return pyre_call(pyre_getattr(expr, attr), args)
+
 def pyre_hasattr(expr, attr):
-    """Checks if an attribute exists in an objects dictionary."""
-    return attr in expr.dict
+    """Checks if an attribute exists in an objects dictionary or its type's methods."""
+    return attr in expr.dict or attr in expr.methods
+
+def pyre_dir(expr):
+    """Lists the names of all the attributes of an object."""
+    return list(expr.dict) + [name for name in expr.methods if name not in expr.dict]
+
+def pyre_setattr(expr, attr, value):
+    """Sets an attribute in an object's own dictionary, creating it on first use.
+       Numbers and strings are immutable, since small ones are shared by the whole
+       process, as are frozen objects."""
+    d = expr.dict
+    if d is _NO_ATTRS:
+        if type(expr) is PyreNumber or type(expr) is PyreString:
+            raise TypeError('cannot set attribute "%s" on "%s", which is immutable!' % (attr, expr))
+        d = expr.dict = {}
+    elif type(d) is MappingProxyType:
+        raise TypeError('cannot set attribute "%s" on "%s", which is shared!' % (attr, expr))
+    d[attr] = value
+
+def pyre_freeze(expr):
+    """Stops attributes being set on an object which every program in the process
+       shares, such as a builtin or a module. Its attributes can still be read."""
+    d = expr.dict
+    if d is _NO_ATTRS:
+        expr.dict = _FROZEN
+    elif type(d) is ProxyDict:
+        d.frozen = True
+    elif type(d) is not MappingProxyType:
+        expr.dict = MappingProxyType(d)
+
+def method_table(base, methods):
+    """Builds the method table of a Pyre type, extending that of its base type.
+       Methods are stored unbound, once per type, and are only bound to an
+       object when they are looked up by pyre_getattr."""
+    table = dict(base)
+    table.update(methods)
+    return table
+
+class ProxyDict(collections.abc.MutableMapping):
+    """The attribute dictionary of a PyreProxy. Attributes of the wrapped Python
+       object are converted to Pyre values the first time they are looked up.
+       Attributes set from Pyre are kept here, and do not change the object, unless
+       it is frozen (see pyre_freeze). If names is given, only those attributes are visible."""
+    __slots__ = ('obj', 'cache', 'names', 'convert', 'frozen')
+
+    def __init__(self, obj, names=None, convert=None):
+        self.obj = obj
+        self.cache = {}
+        self.names = names
+        self.convert = convert if convert is not None else pyre_to_pyre_val
+        self.frozen = False
+
+    def __getitem__(self, name):
+        try:
+            return self.cache[name]
+        except KeyError:
+            pass
+        if name.startswith('__') or (self.names is not None and name not in self.names):
+            raise KeyError(name)
+        try:
+            value = getattr(self.obj, name)
+        except AttributeError:
+            raise KeyError(name) from None
+        value = self.cache[name] = self.convert(value)
+        return value
+
+    def __contains__(self, name):
+        try:
+            self[name]
+        except KeyError:
+            return False
+        return True
 
-class _empty: pass
+    def __setitem__(self, name, value):
+        if self.frozen:
+            raise TypeError('cannot set attribute "%s" on "%s", which is shared!' % (name, self.obj))
+        self.cache[name] = value
 
-def pyre_to_py_val(expr):
-    """Convert a Pyre value to a Python one. Has direct conversion for some types
-       It then falls back to constructing a object."""
-    if expr == PyreNumber(1):
+    def __delitem__(self, name):
+        if self.frozen:
+            raise TypeError('cannot delete attribute "%s" of "%s", which is shared!' % (name, self.obj))
+        del self.cache[name]
+
+    def __iter__(self):
+        if self.names is not None:
+            names = list(self.names)
+        else:
+            names = [name for name in dir(self.obj) if not name.startswith('__')]
+        return iter(names + [name for name in self.cache if name not in names])
+
+    def __len__(self):
+        return len(list(iter(self)))
+
+    def __bool__(self):
         return True
-    elif expr == PyreNumber(0):
-        return False
-    elif expr is Pyre_NONE:
+
+
+class PyreObjectView:
+    """A Python view of a Pyre object, which converts its attributes when they are accessed."""
+    __slots__ = ('_obj',)
+
+    def __init__(self, obj):
+        self._obj = obj
+
+    def __getattr__(self, name):
+        try:
+            return pyre_to_py_val(pyre_getattr(self._obj, name))
+        except AttributeError:
+            raise AttributeError(name) from None
+
+    def __dir__(self):
+        return pyre_dir(self._obj)
+
+
+class ListView(collections.abc.Sequence):
+    """A read-only Python view of the values of a PyreList, converting them as they are accessed."""
+    __slots__ = ('values',)
+
+    def __init__(self, values):
+        self.values = values
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ListView(self.values[index])
+        return pyre_to_py_val(self.values[index])
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return repr(tuple(self))
+
+
+def _bytes_to_py(expr):
+    return expr.value.tobytes() if type(expr.value) is memoryview else expr.value
+
+def _number_to_py(expr):
+    value = expr.value
+    return int(value) if int(value) == value else value
+
+def _func_to_py(expr):
+    if '__call__' not in expr.dict:
+        wrapped = getattr(expr.func, '__wrapped__', None)
+        if wrapped is not None:
+            return wrapped
+    def _call(*args):
+        return pyre_to_py_val(pyre_call(expr, [pyre_to_pyre_val(arg) for arg in args]))
+    return _call
+
+def _object_to_py(expr):
+    if expr is Pyre_NONE:
         return None
-    elif isinstance(expr, PyreNumber):
-        if int(expr.value) == expr.value:
-            return int(expr.value)
-        else:
-            return expr.value
-    elif isinstance(expr, PyreString):
-        return expr.value.encode().decode("unicode_escape")
-    elif isinstance(expr, PyreBytes):
-        return expr.value.decode("unicode_escape").encode()
-    elif isinstance(expr, (PyreList)):
-        return tuple(pyre_to_py_val(x) for x in expr.values)
-    elif isinstance(expr, (PyrePyFunc)):
-        return expr.dict['__call__']
-    elif isinstance(expr, PyreBuffer):
-        return expr.value
-    elif isinstance(expr, PyreObject):
-        obj = _empty()
-        for name, val in expr.dict.items():
-            setattr(obj, name, pyre_to_py_val(val))
-        return obj
+    elif type(expr.dict) is ProxyDict:
+        return expr.dict.obj
+    return PyreObjectView(expr)
+
+def _py_converter(cls):
+    for base in cls.__mro__:
+        if base in _TO_PY_BASE:
+            return _TO_PY_BASE[base]
+    return lambda value: value
+
+def pyre_to_py_val(expr):
+    """Convert a Pyre value to a Python one, with a converter looked up by the value's type.
+       Lists become tuples, and other objects become views which convert their
+       attributes as they are accessed. Non-Pyre values are returned unchanged."""
+    try:
+        convert = _TO_PY[type(expr)]
+    except KeyError:
+        convert = _TO_PY[type(expr)] = _py_converter(type(expr))
+    return convert(expr)
+
+def _func_to_pyre(val):
+    def _wrapper(*args, **kwargs):
+        return pyre_to_pyre_val(val(*list(map(pyre_to_py_val, args)), **kwargs))
+    _wrapper.__wrapped__ = val
+    return PyrePyFunc(_wrapper)
+
+def _pyre_converter(cls):
+    if issubclass(cls, (PyreObject, PyrePyFunc)):
+        return lambda val: val
+    elif any('__call__' in base.__dict__ for base in cls.__mro__):
+        return _func_to_pyre
+    for base in cls.__mro__:
+        if base in _TO_PYRE_BASE:
+            return _TO_PYRE_BASE[base]
+    if issubclass(cls, io.IOBase):
+        return PyreBuffer
+    elif issubclass(cls, collections.abc.Iterator):
+        return lambda val: PyreIterator(map(pyre_to_pyre_val, val))
+    elif issubclass(cls, collections.abc.Iterable):
+        return lambda val: PyreList([pyre_to_pyre_val(v) for v in val])
+    return PyreProxy
 
 def pyre_to_pyre_val(val):
-    """Convert a Python value to a Python one. Has direct conversion for some types
-       It then falls back to constructing a PyreObject."""
-    if callable(val):
-        def _wrapper(*args, **kwargs):
-            return pyre_to_pyre_val(val(*list(map(pyre_to_py_val, args)), **kwargs))
-        return PyrePyFunc(_wrapper)
-    elif val is True:
-        return Pyre_TRUE
-    elif val is False:
-        return Pyre_FALSE
-    elif val is None:
-        return Pyre_NONE
-    elif isinstance(val, str):
-        return PyreString(val)
-    elif isinstance(val, bytes):
-        return PyreBytes(val)
-    elif isinstance(val, (int, float)):
-        return PyreNumber(float(val))
-    elif isinstance(val, io.IOBase):
-        return PyreBuffer(val)
-    elif isinstance(val, collections.Iterable):
-        return PyreList([pyre_to_pyre_val(v) for v in val])
-    else:
-        obj = PyreObject()
-        names = [name for name in dir(val) if not name.startswith('__')]
-        for name, val in zip(names, map(partial(getattr, val), names)):
-            obj._setattr(PyreString(name), pyre_to_pyre_val(val))
-        return obj
+    """Convert a Python value to a Pyre one, with a converter looked up by the value's type.
+       Lists and tuples become lists, iterators become lazy iterators and objects
+       without a more specific conversion are wrapped in a PyreProxy."""
+    try:
+        convert = _TO_PYRE[type(val)]
+    except KeyError:
+        convert = _TO_PYRE[type(val)] = _pyre_converter(type(val))
+    return convert(val)
 
 def pyre_iter_from_py_iter(ite):
-    obj = PyreObject()
-    obj.dict['__iter__'] = PyrePyFunc(lambda: PyrePyFunc(ite.__next__))
-    return obj
+    return PyreIterator(ite)
+
+def pyre_iter(obj):
+    """Iterate over a Pyre object. Its __iter__ method returns a function which
+       gives the next value each time it is called, and raises PyreStopIteration
+       (or a Python StopIteration) once there are none left. The native iterable
+       types are iterated directly, unless __iter__ has been overridden."""
+    if '__iter__' not in obj.dict:
+        if type(obj) is PyreList:
+            yield from obj.values
+            return
+        elif type(obj) is PyreRange:
+            yield from map(pyre_number, obj.values)
+            return
+        elif type(obj) is PyreIterator:
+            yield from obj.iterator
+            return
+        elif type(obj) is PyreArray:
+            yield from map(pyre_number, obj.values.tolist())
+            return
+        elif type(obj) is PyreDict:
+            yield from obj._keys()
+            return
+        elif type(obj) is PyreBuffer or type(obj) is PyreMmap:
+            yield from obj._lines()
+            return
+    _next = pyre_call(pyre_getattr(obj, "__iter__"), [])
+    try:
+        while True:
+            yield pyre_call(_next, [])
+    except (PyreStopIteration, StopIteration):
+        return
         
 class MappingDict(dict):
     """A dictionary that *lazily* maps all values by a function.
@@ -122,32 +340,24 @@ class MappingDict(dict):
     def __getitem__(self, key):
         return self.func(super().__getitem__(key))
 
-class PyreEmptyFunc:
-    """A Pyre function that is *not* a PyreObject (to prevent infinite recursive data structures.)"""
-    def __init__(self, func):
-        self.dict = {}
-        self.dict['__call__'] = func
-
 class PyrePyFunc:
-    """A Pyre fuction that is (for most purposes) a PyreObject."""
-    def __init__(self, func):
+    """A Pyre fuction that is (for most purposes) a PyreObject. Functions defined
+       in Pyre keep their definition: the DefExpr, and the State and (for the VM)
+       frame holding the variables it captures, which is how pyre.serialize
+       pickles them."""
+    __slots__ = ('func', 'dict', 'defn')
+    eq_vars = ('func',)
+
+    def __init__(self, func, defn=None):
         self.func = func
-        self.dict = {}
-        self.dict['__call__'] = func
-        self.dict['setattr'] = PyreEmptyFunc(self._setattr)
-        self.dict['getattr'] = PyreEmptyFunc(self._getattr)
-        self.dict['equals'] = PyreEmptyFunc(self.equals)
-        self.dict['apply'] = PyreEmptyFunc(self.apply)
-        self.dict['str'] = PyreEmptyFunc(self.str)
-        self.dict['dir'] = PyreEmptyFunc(self.dir)
-        self.dict['partial'] = PyreEmptyFunc(self.partial)
-        self.eq_vars = ['func']
+        self.dict = _NO_ATTRS
+        self.defn = defn
 
     def partial(self, *args):
         return PyrePyFunc(partial(self.func, *args))
 
     def dir(self):
-        return pyre_to_pyre_val(self.dict.keys())
+        return PyreList([PyreString(name) for name in pyre_dir(self)])
 
     def str(self):
         return PyreString(str(self))
@@ -163,7 +373,7 @@ class PyrePyFunc:
                     var):
                 return Pyre_FALSE
         if len(self.eq_vars) == 0:
-            if not self.dict == other.dict:
+            if self is not other:
                 return Pyre_FALSE
         return Pyre_TRUE
 
@@ -171,27 +381,35 @@ class PyrePyFunc:
         return pyre_call(func, [self])
 
     def _setattr(self, name, value):
-        self.dict[name.value] = value
+        pyre_setattr(self, name.value, value)
 
     def _getattr(self, name):
-        return self.dict[name.value]
+        if name.value in self.dict:
+            return self.dict[name.value]
+        return pyre_getattr(self, name.value)
+
+    methods = {
+        'setattr': _setattr,
+        'getattr': _getattr,
+        'equals': equals,
+        'apply': apply,
+        'str': str,
+        'dir': dir,
+        'partial': partial
+    }
 
 
 class PyreObject:
 
     """Pyre's base object."""
+    __slots__ = ('dict',)
+    eq_vars = ()
+
     def __init__(self):
-        self.dict = {}
-        self.dict['setattr'] = PyrePyFunc(self._setattr)
-        self.dict['getattr'] = PyrePyFunc(self._getattr)
-        self.dict['equals'] = PyrePyFunc(self.equals)
-        self.dict['apply'] = PyrePyFunc(self.apply)
-        self.dict['str'] = PyrePyFunc(self.str)
-        self.dict['dir'] = PyrePyFunc(self.dir)
-        self.eq_vars = []
+        self.dict = _NO_ATTRS
 
     def dir(self):
-        return pyre_to_pyre_val(self.dict.keys())
+        return PyreList([PyreString(name) for name in pyre_dir(self)])
 
     def str(self):
         return PyreString(str(self))
@@ -207,7 +425,7 @@ class PyreObject:
                     var):
                 return Pyre_FALSE
         if len(self.eq_vars) == 0:
-            if not self.dict == other.dict:
+            if self is not other:
                 return Pyre_FALSE
         return Pyre_TRUE
 
@@ -215,34 +433,103 @@ class PyreObject:
         return pyre_call(func, [self])
 
     def _setattr(self, name, value):
-        self.dict[name.value] = value
+        pyre_setattr(self, name.value, value)
 
     def _getattr(self, name):
-        return self.dict[name.value]
+        if name.value in self.dict:
+            return self.dict[name.value]
+        return pyre_getattr(self, name.value)
+
+    methods = {
+        'setattr': _setattr,
+        'getattr': _getattr,
+        'equals': equals,
+        'apply': apply,
+        'str': str,
+        'dir': dir
+    }
        
 Pyre_NONE = PyreObject()
+Pyre_NONE.dict = _FROZEN
 
 class PyreModule(PyreObject):
     """An object to represent a module in Pyre."""
-    pass
+    __slots__ = ()
+
+
+_modules = {}
+
+def pyre_module_proxy(pymod, convert=None):
+    """A PyreModule for a Python module, whose names are converted the first time they are
+       looked up. Only the names in __all__ are visible, if it is defined. Proxies are
+       cached, so proxying the same module again returns the same PyreModule, which
+       is frozen, as it is shared."""
+    if convert is None:
+        convert = pyre_to_pyre_val
+    key = (pymod.__name__, convert)
+    try:
+        return _modules[key]
+    except KeyError:
+        pass
+    mod = PyreModule()
+    mod.dict = ProxyDict(pymod, getattr(pymod, '__all__', None), convert)
+    pyre_freeze(mod)
+    _modules[key] = mod
+    return mod
+
+
+class PyreProxy(PyreObject):
+    """A Pyre object that wraps a Python object, converting its attributes when they are looked up."""
+    __slots__ = ()
+
+    def __init__(self, obj):
+        self.dict = ProxyDict(obj)
+
+    def __str__(self):
+        return str(self.dict.obj)
+
 
+def _buffer_value(value):
+    """Wrap the result of reading from a file: bytes for binary files and strings for text ones."""
+    return PyreString(value) if isinstance(value, str) else PyreBytes(value)
 
 class PyreBuffer(PyreObject):
-    """A Pyre object that represents any Python object that has read, write and close methods."""
+    """A Pyre object that represents any Python object that has read, write and close methods.
+       Iterating over it gives its lines, one at a time, as they are read."""
+    __slots__ = ('value',)
+    eq_vars = ('value',)
+
     def __init__(self, value):
         super().__init__()
-        self.eq_vars.append('value')
         self.value = value
-        self.dict['read'] = PyrePyFunc(self.read)
-        self.dict['readline'] = PyrePyFunc(self.readline)
-        self.dict['write'] = PyrePyFunc(self.write)
-        self.dict['close'] = PyrePyFunc(self.close)
 
-    def read(self, n):
-        return PyreString(self.value.read(int(n.value)))
+    def _lines(self):
+        value = self.value
+        if isinstance(value, io.IOBase):
+            # Files read ahead in chunks of their buffer size, and split them into lines.
+            for line in value:
+                yield _buffer_value(line)
+            return
+        while True:
+            line = value.readline()
+            if not line:
+                return
+            yield _buffer_value(line)
+
+    def iter(self):
+        return PyrePyFunc(self._lines().__next__)
+
+    def lines(self):
+        return PyreIterator(self._lines())
+
+    def read(self, n=None):
+        return _buffer_value(self.value.read(-1 if n is None else int(n.value)))
 
     def readline(self):
-        return PyreString(self.value.readline())
+        return _buffer_value(self.value.readline())
+
+    def readinto(self, buffer):
+        return pyre_number(self.value.readinto(buffer.value) or 0)
 
     def write(self, bytes):
         self.value.write(bytes.value)
@@ -251,29 +538,120 @@ class PyreBuffer(PyreObject):
     def close(self):
         self.value.close()
 
+    methods = method_table(PyreObject.methods, {
+        'read': read,
+        'readline': readline,
+        'readinto': readinto,
+        'write': write,
+        'close': close,
+        '__iter__': iter,
+        'lines': lines
+    })
+
+class PyreMmap(PyreBuffer):
+    """A Pyre object that represents a memory mapped file. Besides reading and writing
+       it like a file, slices of it can be taken without copying them into memory."""
+    __slots__ = ()
+
+    def len(self):
+        return pyre_number(len(self.value))
+
+    def slice(self, start, stop):
+        return PyreBytes(memoryview(self.value)[int(start.value):int(stop.value)])
+
+    def find(self, sub, start=None):
+        return pyre_number(self.value.find(sub.value, 0 if start is None else int(start.value)))
+
+    def seek(self, pos):
+        self.value.seek(int(pos.value))
+
+    def tell(self):
+        return pyre_number(self.value.tell())
+
+    methods = method_table(PyreBuffer.methods, {
+        'len': len,
+        'slice': slice,
+        'find': find,
+        'seek': seek,
+        'tell': tell
+    })
+
 class PyreBytes(PyreObject):
-    """A Pyre object that represents a Python bytes object."""
+    """A Pyre object that represents a Python bytes object, or a memoryview of part
+       of one, which is how slices are taken without copying."""
+    __slots__ = ('value',)
+    eq_vars = ('value',)
+
     def __init__(self, value):
         super().__init__()
         self.value = value
-        self.eq_vars.append('value')
-        self.dict['len'] = PyrePyFunc(self.len)
-        self.dict['concat'] = PyrePyFunc(self.concat)
-        self.dict['rep'] = PyrePyFunc(self.rep)
-        self.dict['list'] = PyrePyFunc(self.list)
-        self.dict['decode'] = PyrePyFunc(self.decode)
 
     def list(self):
-        return PyreList([PyreBytes(x) for x in self.value])
+        return PyreList([pyre_number(x) for x in self.value])
 
     def concat(self, other):
-        return PyreBytes(self.value + other.value)
+        return PyreBytes(b''.join((self.value, other.value)))
 
     def rep(self, times):
-        return PyreBytes(self.value * int(times.value))
+        return PyreBytes(bytes(self.value) * int(times.value))
+
+    def len(self):
+        return pyre_number(len(self.value))
+
+    def get(self, index):
+        return pyre_number(self.value[int(index.value)])
+
+    def slice(self, start, stop):
+        return PyreBytes(memoryview(self.value)[int(start.value):int(stop.value)])
+
+    def decode(self):
+        return PyreString(str(self.value, 'utf-8'))
+
+    def __str__(self):
+        return str(bytes(self.value))
+
+    methods = method_table(PyreObject.methods, {
+        'len': len,
+        'get': get,
+        'slice': slice,
+        'concat': concat,
+        'rep': rep,
+        'list': list,
+        'decode': decode
+    })
+
+class PyreByteArray(PyreObject):
+    """A Pyre object that represents a Python bytearray: a mutable buffer which can be
+       read into, and appended to in amortised constant time to build up bytes. It can
+       not change size while a slice of it is still in use."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
+
+    def append(self, data):
+        self.value += data.value.encode() if isinstance(data, PyreString) else data.value
+        return data
+
+    def clear(self):
+        del self.value[:]
 
     def len(self):
-        return PyreNumber(len(self.value))
+        return pyre_number(len(self.value))
+
+    def get(self, index):
+        return pyre_number(self.value[int(index.value)])
+
+    def set(self, index, value):
+        self.value[int(index.value)] = int(value.value)
+        return value
+
+    def slice(self, start, stop):
+        return PyreBytes(memoryview(self.value)[int(start.value):int(stop.value)])
+
+    def bytes(self):
+        return PyreBytes(bytes(self.value))
 
     def decode(self):
         return PyreString(self.value.decode())
@@ -281,37 +659,61 @@ class PyreBytes(PyreObject):
     def __str__(self):
         return str(self.value)
 
+    methods = method_table(PyreObject.methods, {
+        'append': append,
+        'clear': clear,
+        'len': len,
+        'get': get,
+        'set': set,
+        'slice': slice,
+        'bytes': bytes,
+        'decode': decode
+    })
+
+def _format_arg(value):
+    if type(value) is PyreNumber:
+        return _number_to_py(value)
+    elif type(value) is PyreString:
+        return value.value
+    return str(value)
+
 class PyreString(PyreObject):
     """A Pyre object that represents a Python unicode string object."""
+    __slots__ = ('value',)
+    eq_vars = ('value',)
+
     def __init__(self, value):
         super().__init__()
         self.value = value
-        self.eq_vars.append('value')
-        self.dict['len'] = PyrePyFunc(self.len)
-        self.dict['num'] = PyrePyFunc(self.num)
-        self.dict['split'] = PyrePyFunc(self.split)
-        self.dict['concat'] = PyrePyFunc(self.concat)
-        self.dict['rep'] = PyrePyFunc(self.rep)
-        self.dict['list'] = PyrePyFunc(self.list)
-        self.dict['encode'] = PyrePyFunc(self.encode)
 
     def list(self):
-        return PyreList([PyreString(x) for x in self.value])
+        return PyreList([pyre_string(x) for x in self.value])
 
     def concat(self, other):
-        return PyreString(self.value + other.value)
+        return pyre_string(self.value + other.value)
 
     def rep(self, times):
-        return PyreString(pyre_to_py_val(self) * int(times.value))
+        return pyre_string(self.value * int(times.value))
+
+    def split(self, sep=None):
+        return PyreList([pyre_string(x) for x in
+                         self.value.split(None if sep is None else sep.value)])
+
+    def slice(self, start, stop=None):
+        return pyre_string(self.value[int(start.value):
+                                      None if stop is None else int(stop.value)])
 
-    def split(self, sep):
-        return PyreList([PyreString(x) for x in pyre_to_py_val(self).split(pyre_to_py_val(sep))])
+    def find(self, sub, start=None):
+        return pyre_number(self.value.find(sub.value, 0 if start is None else int(start.value)))
+
+    def format(self, *args):
+        return pyre_string(self.value.format(*map(_format_arg, args)))
 
     def num(self):
-        return PyreNumber(float(self.value))
+        return pyre_number(float(self.value))
 
     def len(self):
-        return PyreNumber(len(self.value))
+        return pyre_number(len(self.value))
 
     def __str__(self):
         return str(self.value)
@@ -319,33 +721,71 @@ class PyreString(PyreObject):
     def encode(self):
         return PyreBytes(self.value.encode())
 
+    methods = method_table(PyreObject.methods, {
+        'len': len,
+        'num': num,
+        'split': split,
+        'slice': slice,
+        'find': find,
+        'format': format,
+        'concat': concat,
+        'rep': rep,
+        'list': list,
+        'encode': encode
+    })
+
+class PyreStringBuilder(PyreObject):
+    """A Pyre object that builds up a string from pieces. Appending keeps the piece
+       in a list, and they are only joined when the string is asked for, so building
+       a string this way takes time linear in its length."""
+    __slots__ = ('parts', 'size')
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self.size = 0
+
+    def append(self, value):
+        value = value.value if type(value) is PyreString else str(_format_arg(value))
+        self.parts.append(value)
+        self.size += len(value)
+        return self
+
+    def len(self):
+        return pyre_number(self.size)
+
+    def clear(self):
+        self.parts.clear()
+        self.size = 0
+
+    def __str__(self):
+        if len(self.parts) > 1:
+            self.parts[:] = [''.join(self.parts)]
+        return self.parts[0] if self.parts else ''
+
+    methods = method_table(PyreObject.methods, {
+        'append': append,
+        'len': len,
+        'clear': clear
+    })
+
 class PyreList(PyreObject):
     """A a Pyre object that represents a mutable Python list."""
+    __slots__ = ('values',)
+    eq_vars = ('values',)
+
     def __init__(self, values):
         super().__init__()
         self.values = values
-        self.eq_vars.append('values')
-        self.dict['get'] = PyrePyFunc(self.get)
-        self.dict['set'] = PyrePyFunc(self.set)
-        self.dict['append'] = PyrePyFunc(self.append)
-        self.dict['pop'] = PyrePyFunc(self.pop)
-        self.dict['join'] = PyrePyFunc(self.join)
-        self.dict['map'] = PyrePyFunc(self.map)
-        self.dict['len'] = PyrePyFunc(self.len)
-        self.dict['filter'] = PyrePyFunc(self.filter)
-        self.dict['reverse'] = PyrePyFunc(self.reverse)
-        self.dict['__iter__'] = PyrePyFunc(self.iter)
-        self.dict['index'] = PyrePyFunc(self.index)
-        self.dict['take'] = PyrePyFunc(self.take)
-        self.dict['drop'] = PyrePyFunc(self.drop)
-        self.dict['enumerate'] = PyrePyFunc(self.enumerate)
         
     def enumerate(self):
-        return pyre_iter_from_py_iter(self._enumerate())
-        
-    def _enumerate(self):
-        for i, value in enumerate(self.values):
-            yield PyreList([PyreNumber(i), value])
+        return self.lazy().enumerate()
+
+    def zip(self, *others):
+        return self.lazy().zip(*others)
+
+    def lazy(self):
+        return PyreIterator(self.values)
 
     def iter(self):
         i = -1
@@ -353,7 +793,7 @@ class PyreList(PyreObject):
             nonlocal i
             i += 1
             if i >= len(self.values):
-                raise Exception("stopiter")
+                raise PyreStopIteration()
             return self.values[i]
         return PyrePyFunc(_next)
 
@@ -366,7 +806,7 @@ class PyreList(PyreObject):
     def index(self, value):
         for i, val in enumerate(self.values):
             if pyre_truthy(val.equals(value)):
-               return PyreNumber(i)
+               return pyre_number(i)
         raise IndexError("'%s' not in list!" % value)
 
     def reverse(self):
@@ -389,7 +829,7 @@ class PyreList(PyreObject):
         self.values[int(index.value)] = value
 
     def len(self):
-        return PyreNumber(len(self.values))
+        return pyre_number(len(self.values))
 
     def map(self, func):
         return PyreList([pyre_call(func, [x]) for x in self.values])
@@ -398,45 +838,529 @@ class PyreList(PyreObject):
         return PyreList(
             [x for x in self.values if pyre_truthy(pyre_call(func, [x]))])
 
+    def equals(self, other):
+        if type(other) is PyreRange:
+            return other.equals(self)
+        return PyreObject.equals(self, other)
+
     def __str__(self):
         return "[%s]" % (', '.join(map(str, self.values)))
 
+    methods = method_table(PyreObject.methods, {
+        'get': get,
+        'set': set,
+        'append': append,
+        'pop': pop,
+        'join': join,
+        'map': map,
+        'len': len,
+        'filter': filter,
+        'reverse': reverse,
+        '__iter__': iter,
+        'index': index,
+        'take': take,
+        'drop': drop,
+        'enumerate': enumerate,
+        'zip': zip,
+        'lazy': lazy,
+        'equals': equals
+    })
+
+class PyreRange(PyreObject):
+    """A Pyre object that represents a Python range. Its numbers are only
+       created as they are iterated over. It has the methods of a list, and
+       the first of them that changes it turns it into a list of its numbers."""
+    # The same slots as PyreList, so that it can become one.
+    __slots__ = ('values',)
+
+    def __init__(self, range):
+        super().__init__()
+        self.values = range
+
+    def _to_list(self):
+        self.values = [pyre_number(x) for x in self.values]
+        self.__class__ = PyreList
+        return self
+
+    def iter(self):
+        return PyrePyFunc(map(pyre_number, self.values).__next__)
+
+    def lazy(self):
+        return PyreIterator(map(pyre_number, self.values))
+
+    def list(self):
+        return PyreList([pyre_number(x) for x in self.values])
+
+    def get(self, index):
+        return pyre_number(self.values[int(index.value)])
+
+    def len(self):
+        return pyre_number(len(self.values))
+
+    def index(self, value):
+        for i, x in enumerate(self.values):
+            if pyre_truthy(pyre_number(x).equals(value)):
+                return pyre_number(i)
+        raise IndexError("'%s' not in list!" % value)
+
+    def join(self, sep):
+        return PyreString(sep.value.join(str(pyre_number(x)) for x in self.values))
+
+    def take(self, num):
+        return PyreRange(self.values[:int(num.value)])
+
+    def drop(self, num):
+        return PyreRange(self.values[int(num.value):])
+
+    def reverse(self):
+        return PyreRange(self.values[::-1])
+
+    def map(self, func):
+        return PyreList([pyre_call(func, [pyre_number(x)]) for x in self.values])
+
+    def filter(self, func):
+        return self.lazy().filter(func).list()
+
+    def enumerate(self):
+        return self.lazy().enumerate()
+
+    def zip(self, *others):
+        return self.lazy().zip(*others)
+
+    def equals(self, other):
+        if type(other) is PyreRange:
+            return Pyre_TRUE if self.values == other.values else Pyre_FALSE
+        if type(other) is not PyreList or len(other.values) != len(self.values):
+            return Pyre_FALSE
+        for x, value in zip(self.values, other.values):
+            if not pyre_truthy(pyre_number(x).equals(value)):
+                return Pyre_FALSE
+        return Pyre_TRUE
+
+    def append(self, object):
+        return self._to_list().append(object)
+
+    def pop(self):
+        return self._to_list().pop()
+
+    def set(self, index, value):
+        return self._to_list().set(index, value)
+
+    def __str__(self):
+        return "[%s]" % ', '.join(str(pyre_number(x)) for x in self.values)
+
+    methods = method_table(PyreObject.methods, {
+        'get': get,
+        'set': set,
+        'append': append,
+        'pop': pop,
+        'join': join,
+        'len': len,
+        'map': map,
+        'filter': filter,
+        'reverse': reverse,
+        '__iter__': iter,
+        'index': index,
+        'take': take,
+        'drop': drop,
+        'enumerate': enumerate,
+        'zip': zip,
+        'lazy': lazy,
+        'list': list,
+        'equals': equals
+    })
+
+class PyreIterator(PyreObject):
+    """A Pyre object that represents a Python iterator over Pyre values.
+       Its map, filter, enumerate, zip, take and drop methods return new
+       iterators, so they can be chained without building intermediate
+       lists. Like any iterator, it can only be iterated over once."""
+    __slots__ = ('iterator',)
+
+    def __init__(self, iterator):
+        super().__init__()
+        self.iterator = iter(iterator)
+
+    def iter(self):
+        return PyrePyFunc(self.iterator.__next__)
+
+    def map(self, func):
+        return PyreIterator(pyre_call(func, [x]) for x in self.iterator)
+
+    def filter(self, func):
+        return PyreIterator(x for x in self.iterator if pyre_truthy(pyre_call(func, [x])))
+
+    def enumerate(self):
+        return PyreIterator(PyreList([pyre_number(i), x]) for i, x in enumerate(self.iterator))
+
+    def zip(self, *others):
+        return PyreIterator(PyreList(list(values))
+                            for values in zip(self.iterator, *map(pyre_iter, others)))
+
+    def take(self, num):
+        return PyreIterator(itertools.islice(self.iterator, int(num.value)))
+
+    def drop(self, num):
+        return PyreIterator(itertools.islice(self.iterator, int(num.value), None))
+
+    def list(self):
+        return PyreList(list(self.iterator))
+
+    def __str__(self):
+        return '<iterator>'
+
+    methods = method_table(PyreObject.methods, {
+        'map': map,
+        'filter': filter,
+        '__iter__': iter,
+        'enumerate': enumerate,
+        'zip': zip,
+        'take': take,
+        'drop': drop,
+        'list': list
+    })
+
+_IDENTITY_EQUALS = PyreObject.methods['equals']
+
+def _dict_key(key):
+    """The Python value a key is hashed by in a PyreDict, or None if the key can only
+       be compared with equals. Numbers, strings and bytes are hashed by their value,
+       functions by the Python function they call, and objects which are only equal to
+       themselves by their identity. That excludes types whose method table overrides
+       equals, such as lists, ranges, arrays and dicts."""
+    t = type(key)
+    if t is PyreNumber or t is PyreString:
+        return key.value
+    elif t is PyreBytes:
+        return bytes(key.value)
+    elif t is PyrePyFunc:
+        return key.func
+    elif not t.eq_vars and t.methods['equals'] is _IDENTITY_EQUALS and 'equals' not in key.dict:
+        return key
+    return None
+
+class PyreDict(PyreObject):
+    """A Pyre object that represents a hash table. Keys with a hashable Python value
+       (see _dict_key) are kept in a Python dict, so looking them up takes constant
+       time; any other keys are kept in a list and found by calling equals."""
+    __slots__ = ('table', 'others')
+
+    def __init__(self, pairs=()):
+        super().__init__()
+        self.table = {}
+        self.others = []
+        for key, value in pairs:
+            self._set(key, value)
+
+    def _find(self, key):
+        for pair in self.others:
+            if pyre_truthy(pyre_call(pyre_getattr(pair[0], 'equals'), [key])):
+                return pair
+        return None
+
+    def _set(self, key, value):
+        k = _dict_key(key)
+        if k is not None:
+            pair = self.table.get(k)
+            if pair is None:
+                self.table[k] = [key, value]
+            else:
+                pair[1] = value
+        else:
+            pair = self._find(key)
+            if pair is None:
+                self.others.append([key, value])
+            else:
+                pair[1] = value
+
+    def _pairs(self):
+        yield from self.table.values()
+        yield from self.others
+
+    def _keys(self):
+        """A list of the keys, so that the dict can be changed while they are iterated over."""
+        return [pair[0] for pair in self._pairs()]
+
+    def get(self, key, default=None):
+        k = _dict_key(key)
+        pair = self.table.get(k) if k is not None else self._find(key)
+        if pair is None:
+            if default is None:
+                raise KeyError("'%s' not in dict!" % key)
+            return default
+        return pair[1]
+
+    def set(self, key, value):
+        self._set(key, value)
+        return value
+
+    def delete(self, key):
+        k = _dict_key(key)
+        if k is not None:
+            pair = self.table.pop(k, None)
+        else:
+            pair = self._find(key)
+            if pair is not None:
+                self.others.remove(pair)
+        if pair is None:
+            raise KeyError("'%s' not in dict!" % key)
+        return pair[1]
+
+    def has(self, key):
+        k = _dict_key(key)
+        found = k in self.table if k is not None else self._find(key) is not None
+        return Pyre_TRUE if found else Pyre_FALSE
+
+    def len(self):
+        return pyre_number(len(self.table) + len(self.others))
+
+    def keys(self):
+        return PyreList(self._keys())
+
+    def values(self):
+        return PyreList([pair[1] for pair in self._pairs()])
+
+    def items(self):
+        return PyreIterator(PyreList(list(pair)) for pair in self._pairs())
+
+    def iter(self):
+        return PyrePyFunc(iter(self._keys()).__next__)
+
+    def equals(self, other):
+        if not isinstance(other, PyreDict) or len(other.table) != len(self.table) \
+                or len(other.others) != len(self.others):
+            return Pyre_FALSE
+        for key, value in self._pairs():
+            if not pyre_truthy(other.has(key)) or \
+                    not pyre_truthy(pyre_call(pyre_getattr(value, 'equals'), [other.get(key)])):
+                return Pyre_FALSE
+        return Pyre_TRUE
+
+    def __str__(self):
+        return '{%s}' % ', '.join('%s: %s' % (key, value) for key, value in self._pairs())
+
+    methods = method_table(PyreObject.methods, {
+        'get': get,
+        'set': set,
+        'delete': delete,
+        'has': has,
+        'len': len,
+        # Attributes rather than methods, as they were when dicts were written in Pyre.
+        'keys': property(keys),
+        'values': property(values),
+        'items': items,
+        '__iter__': iter,
+        'equals': equals
+    })
+
+# The storage of a PyreArray is a one dimensional float64 numpy array when numpy
+# is installed, and a memoryview of an array.array('d') otherwise. Both slice
+# without copying and convert to a list of Python floats with tolist. Arrays
+# are passed to Python as numpy arrays, or else copied into an array.array.
+if numpy is not None:
+    def _array_storage(values):
+        return numpy.fromiter(values, float)
+
+    def _array_buffer(buffer):
+        return numpy.asarray(memoryview(buffer), float)
+
+    def _array_to_py(a):
+        return a
+
+    def _array_apply(op, a, b):
+        return numpy.asarray(op(a, b), float)
+
+    def _array_equal(a, b):
+        return numpy.array_equal(a, b)
+
+    def _array_sum(a):
+        return float(a.sum())
+
+    def _array_min(a):
+        return float(a.min())
+
+    def _array_max(a):
+        return float(a.max())
+else:
+    def _array_storage(values):
+        return memoryview(array.array('d', values))
+
+    def _array_buffer(buffer):
+        return memoryview(buffer).cast('B').cast('d')
+
+    def _array_to_py(a):
+        return array.array('d', a)
+
+    def _array_apply(op, a, b):
+        if isinstance(b, float):
+            b = itertools.repeat(b)
+        return memoryview(array.array('d', map(op, a, b)))
+
+    def _array_equal(a, b):
+        return a == b
+
+    def _array_sum(a):
+        return math.fsum(a)
+
+    _array_min = min
+    _array_max = max
+
+class PyreArray(PyreObject):
+    """A Pyre object that represents an array of floating point numbers. The numbers
+       are stored unboxed, arithmetic and comparisons work on whole arrays at once,
+       and slices share the storage of the array they are taken from."""
+    __slots__ = ('values',)
+
+    def __init__(self, values):
+        super().__init__()
+        self.values = values
+
+    def __reduce__(self):
+        return (pyre_array, (self.values.tolist(),), (None, {'dict': self.dict}))
+
+    def _apply(self, other, op):
+        if isinstance(other, PyreArray):
+            if len(other.values) != len(self.values):
+                raise ValueError("Arrays of length %d and %d can't be combined!" %
+                                 (len(self.values), len(other.values)))
+            return PyreArray(_array_apply(op, self.values, other.values))
+        return PyreArray(_array_apply(op, self.values, float(other.value)))
+
+    def add(self, other):
+        return self._apply(other, operator.add)
+
+    def sub(self, other):
+        return self._apply(other, operator.sub)
+
+    def mul(self, other):
+        return self._apply(other, operator.mul)
+
+    def div(self, other):
+        return self._apply(other, operator.truediv)
+
+    def pow(self, other):
+        return self._apply(other, operator.pow)
+
+    def gt(self, other):
+        return self._apply(other, operator.gt)
+
+    def lt(self, other):
+        return self._apply(other, operator.lt)
+
+    def eq(self, other):
+        return self._apply(other, operator.eq)
+
+    def equals(self, other):
+        if (isinstance(other, PyreArray) and len(other.values) == len(self.values)
+                and _array_equal(self.values, other.values)):
+            return Pyre_TRUE
+        return Pyre_FALSE
+
+    def sum(self):
+        return pyre_number(_array_sum(self.values))
+
+    def min(self):
+        return pyre_number(_array_min(self.values))
+
+    def max(self):
+        return pyre_number(_array_max(self.values))
+
+    def mean(self):
+        return pyre_number(_array_sum(self.values) / len(self.values))
+
+    def get(self, index):
+        return pyre_number(float(self.values[int(index.value)]))
+
+    def set(self, index, value):
+        self.values[int(index.value)] = float(value.value)
+        return value
+
+    def len(self):
+        return pyre_number(len(self.values))
+
+    def slice(self, start, stop, step=None):
+        return PyreArray(self.values[int(start.value):int(stop.value):
+                                     1 if step is None else int(step.value)])
+
+    def take(self, num):
+        return PyreArray(self.values[:int(num.value)])
+
+    def drop(self, num):
+        return PyreArray(self.values[int(num.value):])
+
+    def reverse(self):
+        return PyreArray(self.values[::-1])
+
+    def map(self, func):
+        return PyreArray(_array_storage(
+            pyre_call(func, [pyre_number(x)]).value for x in self.values.tolist()))
+
+    def iter(self):
+        return PyrePyFunc(map(pyre_number, self.values.tolist()).__next__)
+
+    def lazy(self):
+        return PyreIterator(map(pyre_number, self.values.tolist()))
+
+    def list(self):
+        return PyreList([pyre_number(x) for x in self.values.tolist()])
+
+    def __str__(self):
+        return "[%s]" % ', '.join(str(pyre_number(x)) for x in self.values.tolist())
+
+    methods = method_table(PyreObject.methods, {
+        'add': add,
+        'sub': sub,
+        'mul': mul,
+        'div': div,
+        'pow': pow,
+        'gt': gt,
+        'lt': lt,
+        'eq': eq,
+        'equals': equals,
+        'sum': sum,
+        'min': min,
+        'max': max,
+        'mean': mean,
+        'get': get,
+        'set': set,
+        'len': len,
+        'slice': slice,
+        'take': take,
+        'drop': drop,
+        'reverse': reverse,
+        'map': map,
+        '__iter__': iter,
+        'lazy': lazy,
+        'list': list
+    })
+
+def pyre_array(values):
+    """Make a PyreArray from an iterable of Python numbers."""
+    return PyreArray(_array_storage(values))
+
 class PyreNumber(PyreObject):
     """A Pyre object that represents a Python integer or floating point."""
+    __slots__ = ('value',)
+    eq_vars = ('value',)
+
     def __init__(self, value):
-        super().__init__()
+        self.dict = _NO_ATTRS
         self.value = value
-        self.eq_vars.append('value')
-        self.dict['add'] = PyrePyFunc(self.add)
-        self.dict['sub'] = PyrePyFunc(self.sub)
-        self.dict['mul'] = PyrePyFunc(self.mul)
-        self.dict['div'] = PyrePyFunc(self.div)
-        self.dict['pow'] = PyrePyFunc(self.pow)
-        self.dict['mod'] = PyrePyFunc(self.mod)
-        self.dict['gt'] = PyrePyFunc(self.gt)
-        self.dict['lt'] = PyrePyFunc(self.lt)
-        self.dict['or'] = PyrePyFunc(self.lor)
-        self.dict['and'] = PyrePyFunc(self.land)
-        self.dict['not'] = PyrePyFunc(self.lnot)
-        self.dict['int'] = PyrePyFunc(self.int)
-        self.dict['bxor'] = PyrePyFunc(self.bxor)
-        self.dict['rshift'] = PyrePyFunc(self.rshift)
-        self.dict['lshift'] = PyrePyFunc(self.lshift)
 
     def rshift(self, other):
-        return PyreNumber(self.value >> other.value)
+        return pyre_number(self.value >> other.value)
 
     def lshift(self, other):
-        return PyreNumber(self.value << other.value)
+        return pyre_number(self.value << other.value)
 
     def bxor(self, other):
-        return PyreNumber(self.value ^ other.value)
+        return pyre_number(self.value ^ other.value)
 
     def mod(self, other):
-        return PyreNumber(self.value % other.value)
+        return pyre_number(self.value % other.value)
 
     def int(self):
-        return PyreNumber(int(self.value))
+        return pyre_number(int(self.value))
 
     def lor(self, other):
         if pyre_truthy(self) or pyre_truthy(other):
@@ -460,19 +1384,19 @@ class PyreNumber(PyreObject):
         return str(self.value)
 
     def add(self, other):
-        return PyreNumber(self.value + other.value)
+        return pyre_number(self.value + other.value)
 
     def sub(self, other):
-        return PyreNumber(self.value - other.value)
+        return pyre_number(self.value - other.value)
 
     def mul(self, other):
-        return PyreNumber(self.value * other.value)
+        return pyre_number(self.value * other.value)
 
     def div(self, other):
-        return PyreNumber(self.value / other.value)
+        return pyre_number(self.value / other.value)
 
     def pow(self, other):
-        return PyreNumber(self.value ** other.value)
+        return pyre_number(self.value ** other.value)
 
     def gt(self, other):
         if self.value > other.value:
@@ -486,5 +1410,93 @@ class PyreNumber(PyreObject):
         else:
             return Pyre_FALSE
 
-Pyre_TRUE = PyreNumber(1)
-Pyre_FALSE = PyreNumber(0)
\ No newline at end of file
+    methods = method_table(PyreObject.methods, {
+        'add': add,
+        'sub': sub,
+        'mul': mul,
+        'div': div,
+        'pow': pow,
+        'mod': mod,
+        'gt': gt,
+        'lt': lt,
+        'or': lor,
+        'and': land,
+        'not': lnot,
+        'int': int,
+        'bxor': bxor,
+        'rshift': rshift,
+        'lshift': lshift
+    })
+
+_SMALL_NUMBERS = {
+    int: {i: PyreNumber(i) for i in range(-5, 257)},
+    float: {float(i): PyreNumber(float(i)) for i in range(-5, 257)}
+}
+
+_SMALL_STRINGS = {chr(i): PyreString(chr(i)) for i in range(256)}
+_SMALL_STRINGS[''] = PyreString('')
+
+Pyre_TRUE = _SMALL_NUMBERS[int][1]
+Pyre_FALSE = _SMALL_NUMBERS[int][0]
+
+def pyre_number(value):
+    """Returns a PyreNumber for value, sharing the interned instances of small integral values."""
+    cache = _SMALL_NUMBERS.get(type(value))
+    if cache is not None:
+        number = cache.get(value)
+        if number is not None:
+            return number
+    return PyreNumber(value)
+
+def pyre_string(value):
+    """Returns a PyreString for value, sharing the interned instances of empty and single character strings."""
+    if len(value) <= 1:
+        string = _SMALL_STRINGS.get(value)
+        if string is not None:
+            return string
+    return PyreString(value)
+
+def pyre_constant(value):
+    """Builds the value of a literal in the source, which every evaluation of the
+       literal returns."""
+    return pyre_string(value) if isinstance(value, str) else pyre_number(value)
+
+_TO_PY = {}
+_TO_PY_BASE = {
+    PyreNumber: _number_to_py,
+    PyreString: lambda expr: expr.value,
+    PyreBytes: _bytes_to_py,
+    PyreList: lambda expr: tuple(map(pyre_to_py_val, expr.values)),
+    PyreRange: lambda expr: tuple(expr.values),
+    PyreIterator: lambda expr: map(pyre_to_py_val, expr.iterator),
+    PyreArray: lambda expr: _array_to_py(expr.values),
+    PyreDict: lambda expr: {pyre_to_py_val(key): pyre_to_py_val(value)
+                            for key, value in expr._pairs()},
+    PyrePyFunc: _func_to_py,
+    PyreBuffer: lambda expr: expr.value,
+    PyreStringBuilder: str,
+    PyreByteArray: lambda expr: expr.value,
+    PyreObject: _object_to_py
+}
+
+_TO_PYRE = {}
+_TO_PYRE_BASE = {
+    bool: lambda val: Pyre_TRUE if val else Pyre_FALSE,
+    type(None): lambda val: Pyre_NONE,
+    str: pyre_string,
+    bytes: PyreBytes,
+    bytearray: PyreByteArray,
+    dict: lambda val: PyreDict((pyre_to_pyre_val(key), pyre_to_pyre_val(value))
+                               for key, value in val.items()),
+    int: lambda val: pyre_number(float(val)),
+    float: pyre_number,
+    list: lambda val: PyreList([pyre_to_pyre_val(v) for v in val]),
+    tuple: lambda val: PyreList([pyre_to_pyre_val(v) for v in val]),
+    range: PyreRange,
+    array.array: lambda val: PyreArray(_array_buffer(val) if val.typecode == 'd'
+                                       else _array_storage(val)),
+    ModuleType: pyre_module_proxy
+}
+
+if numpy is not None:
+    _TO_PYRE_BASE[numpy.ndarray] = lambda val: PyreArray(numpy.asarray(val, float).ravel())
@@ -0,0 +1,139 @@
+"""
+(c) Tuomas Laakkonen 2015, under the MIT license.
+
+pyre.optimizer
+
+An optimizer for the Pyre AST, run by pyre.runtime between parsing and
+evaluation. It rewrites the tree in place:
+
+* Calls of the pure builtin methods of numbers and strings whose receiver and
+  arguments are all literals are folded into a literal of their result, which
+  is then made once, like any literal, instead of on every evaluation.
+* An if whose condition is a literal is replaced by the branch it would take.
+* A block which declares no variables is replaced by a Seq, which evaluates
+  its expressions in the enclosing scope instead of a new one.
+
+Calls which raise an error, or whose result is very large, are left to be made
+at run time.
+"""
+
+from pyre.parser import (
+    Call,
+    Attr,
+    IfExpr,
+    Number,
+    String,
+    Block,
+    Seq,
+    VarExpr,
+    WhileExpr,
+    DefExpr,
+    TryExpr,
+    ReturnExpr,
+    ForExpr,
+    ModuleExpr)
+from pyre.objspace import PyreNumber, PyreString, pyre_constant, pyre_truthy
+from pyre.resolver import children
+
+# The methods which can be folded, by the type of their receiver: those which
+# neither call Pyre code nor change or depend on any object but their arguments.
+# Numbers and strings are immutable, so these can never be overridden on them.
+PURE_METHODS = {
+    PyreNumber: {'add', 'sub', 'mul', 'div', 'pow', 'mod', 'gt', 'lt', 'or', 'and',
+                 'not', 'int', 'bxor', 'rshift', 'lshift', 'equals', 'str'},
+    PyreString: {'len', 'num', 'slice', 'find', 'format', 'concat', 'rep', 'equals', 'str'}
+}
+
+# The longest string a call is folded into.
+MAX_STRING = 1024
+
+
+def _literal(expr):
+    return type(expr) is Number or type(expr) is String
+
+
+def _value(expr):
+    if expr.const is None:
+        expr.const = pyre_constant(expr.value)
+    return expr.const
+
+
+def _fold(expr):
+    """Fold a call of a pure method on literals, returning the literal of its
+       result, or expr if it cannot be folded."""
+    stem = expr.value
+    if type(stem) is not Attr or not _literal(stem.value) or not all(map(_literal, expr.args)):
+        return expr
+    obj = _value(stem.value)
+    if stem.name not in PURE_METHODS[type(obj)]:
+        return expr
+    args = [_value(arg) for arg in expr.args]
+    try:
+        if stem.name == 'rep' and len(obj.value) * args[0].value > MAX_STRING:
+            return expr
+        result = obj.methods[stem.name](obj, *args)
+    except Exception:
+        return expr
+    if type(result) is PyreNumber:
+        literal = Number(result.value)
+    elif type(result) is PyreString and len(result.value) <= MAX_STRING:
+        literal = String(result.value)
+    else:
+        return expr
+    literal.pos = expr.pos
+    return literal
+
+
+def declares(expr):
+    """Whether an expression declares a variable in the scope it is evaluated in."""
+    if isinstance(expr, (VarExpr, ForExpr)):
+        return True
+    elif isinstance(expr, (DefExpr, ModuleExpr)):
+        return False
+    return any(declares(child) for child in children(expr))
+
+
+def optimize(tree):
+    """Optimize a parsed program, returning the new root of its tree."""
+    return _optimize(tree)
+
+
+def _optimize(expr):
+    t = type(expr)
+    if t is Call:
+        expr.args = [_optimize(arg) for arg in expr.args]
+        expr.value = _optimize(expr.value)
+        return _fold(expr)
+    elif t is Attr:
+        expr.value = _optimize(expr.value)
+    elif t is IfExpr:
+        expr.cond = _optimize(expr.cond)
+        if _literal(expr.cond):
+            branch = expr.body if pyre_truthy(_value(expr.cond)) else expr.elsebody
+            if branch is None:
+                branch = Seq([])
+                branch.pos = expr.pos
+            return _optimize(branch)
+        expr.body = _optimize(expr.body)
+        if expr.elsebody is not None:
+            expr.elsebody = _optimize(expr.elsebody)
+    elif t is Block or t is Seq:
+        expr.value = [_optimize(e) for e in expr.value]
+        if t is Block and not declares(expr):
+            seq = Seq(expr.value)
+            seq.pos = expr.pos
+            return seq
+    elif t is VarExpr or t is ReturnExpr:
+        expr.value = _optimize(expr.value)
+    elif t is WhileExpr:
+        expr.cond = _optimize(expr.cond)
+        expr.body = _optimize(expr.body)
+    elif t is ForExpr:
+        expr.expr = _optimize(expr.expr)
+        expr.body = _optimize(expr.body)
+    elif t is DefExpr or t is ModuleExpr:
+        expr.body = _optimize(expr.body)
+    elif t is TryExpr:
+        expr.body = _optimize(expr.body)
+        expr.exceptbody = _optimize(expr.exceptbody)
+    return expr
@@ -4,28 +4,27 @@
 pyre.parser
 
 A parser for Pyre. Utilizes funcparserlib for functional, monadic parsing.
+A faster, hand-written parser for the same grammar lives in pyre.rdparser,
+and can be selected with set_backend. funcparserlib is only imported, and the
+grammar only built, the first time a program is parsed with it.
 """
 
 
-from funcparserlib.parser import *
-from funcparserlib.lexer import make_tokenizer
-import re
-
-fwd = forward_decl
-eof = finished
-
-
 def spec(name, regex, flags=None):
     return (name, (regex, flags)) if flags else (name, (regex,))
 
 
 def tok(type, value=None):
+    from funcparserlib.parser import some
     if value is None:
         return some(lambda t: t.type == type)
     else:
         return some(lambda t: t.type == type and t.value == value)
 
 token_specs = [
+    spec(
+        'comment',
+        r'#[^\r\n]*'),
     spec(
         'keyword',
         r'((if)|(do)|(else)|(end)|(while)|(def)|(let)|'
@@ -71,33 +70,32 @@ token_specs = [
 token_types = [spec[0] for spec in token_specs]
 
 ignore_tokens = [
+    'comment',
     'ws',
     'nl'
 ]
 
-tokenizer = make_tokenizer(token_specs)
-
-
-def remove_comments(s):
-    return re.sub('#.*$', '', s, flags=re.MULTILINE)
+_tokenizer = None
 
 
 def tokenize(s):
-    s = remove_comments(s)
-    return list(filter(lambda x: x.type not in ignore_tokens, tokenizer(s)))
+    global _tokenizer
+    if _tokenizer is None:
+        from funcparserlib.lexer import make_tokenizer
+        _tokenizer = make_tokenizer(token_specs)
+    return list(filter(lambda x: x.type not in ignore_tokens, _tokenizer(s)))
 
 
 def print_tokens(t):
     print('\n'.join(map(repr, t)))
 
-for type in token_types:
-    globals()[type] = tok(type)
-
 
 def keyword(t):
     return tok('keyword', t)
 
 class AstNode:
+    # The (line, column) the expression starts at, which both parsers set.
+    pos = None
 
     def __init__(self, value):
         self.value = value
@@ -113,11 +111,13 @@ class AstNode:
 
 class Number(AstNode):
     type = "Number"
-    pass
+    const = None
 
 
 class String(AstNode):
     type = "String"
+    const = None
+
     def __str__(self):
         return '"%s"' % self.value
 
@@ -132,6 +132,7 @@ class Call(AstNode):
     def __init__(self, value, args):
         self.value = value
         self.args = args
+        self.cache = [(None, None)]
 
     def __str__(self):
         return '%s(%s)' % (self.value, ', '.join(map(str, self.args)))
@@ -146,8 +147,40 @@ class Attr(AstNode):
         return '%s.%s' % (self.value, self.name)
 
 
+def discard(expr):
+    """Mark an expression whose value is never used, so that any loops which
+       produce that value needn't collect their results into a list."""
+    if isinstance(expr, (WhileExpr, ForExpr)):
+        expr.collect = False
+        discard(expr.body)
+    elif isinstance(expr, (Block, Seq)):
+        if expr.value:
+            discard(expr.value[-1])
+    elif isinstance(expr, IfExpr):
+        discard(expr.body)
+        if expr.elsebody is not None:
+            discard(expr.elsebody)
+    elif isinstance(expr, TryExpr):
+        discard(expr.body)
+        discard(expr.exceptbody)
+
+
 class Block(AstNode):
     type = "Block"
+    def __init__(self, value):
+        self.value = value
+        for e in value[:-1]:
+            discard(e)
+
+    def __str__(self):
+        return 'do\n %s\nend' % ('\n '.join(map(str, self.value)))
+
+
+class Seq(AstNode):
+    """A block which declares no variables, so evaluates its expressions in the
+       enclosing scope. The parsers never make these: pyre.optimizer does."""
+    type = "Seq"
+
     def __str__(self):
         return 'do\n %s\nend' % ('\n '.join(map(str, self.value)))
 
@@ -165,6 +198,8 @@ class VarExpr(AstNode):
     type = "Var"
     def __init__(self, mut, var, value):
         self.mut, self.var, self.value = bool(mut), var.value, value
+        if isinstance(value, DefExpr) and value.name is None:
+            value.name = self.var
 
     def __str__(self):
         return 'var %s = %s' % (self.var, self.value)
@@ -172,6 +207,7 @@ class VarExpr(AstNode):
 
 class WhileExpr(AstNode):
     type = "While"
+    collect = True
     def __init__(self, cond, body):
         self.cond, self.body = cond, body
 
@@ -180,11 +216,19 @@ class WhileExpr(AstNode):
 
 class ForExpr(AstNode):
     type = "For"
+    collect = True
     def __init__(self, var, expr, body):
         self.var, self.expr, self.body = var, expr, body
 
+    def __str__(self):
+        return 'for %s in %s %s' % (self.var.value, self.expr, self.body)
+
 class DefExpr(AstNode):
     type = "Def"
+    # The variable the function is assigned to where it is defined, if any.
+    name = None
+    # The variables of enclosing scopes it uses, set by pyre.resolver.
+    captures = None
     def __init__(self, args, body):
         self.args, self.body = args, body
 
@@ -224,6 +268,7 @@ class ModuleExpr(AstNode):
     def __init__(self, args, body):
         self.args = args if args is not None else []
         self.body = body
+        discard(body)
 
     def __str__(self):
         return 'module %s' % self.body
@@ -233,22 +278,32 @@ def parse_args(t):
     return [t[0]] + t[1]
 
 
+def unescape(value):
+    """Decode the backslash escapes of a string literal, as Python does."""
+    if '\\' not in value:
+        return value
+    return value.encode('latin-1', 'backslashreplace').decode('unicode_escape')
+
+
 def parse_stem(t):
     if t.type == 'intn' or t.type == 'floatn':
-        return Number(float(t.value))
+        stem = Number(float(t.value))
     elif t.type == 'string':
-        return String(t.value[1:-1])
+        stem = String(unescape(t.value[1:-1]))
     elif t.type == 'ident':
-        return Name(t.value)
+        stem = Name(t.value)
+    stem.pos = t.start
+    return stem
 
 
 def parse_call(t):
     stem, args = t
-    if hasattr(stem, 'type'):
+    if not isinstance(stem, AstNode):
         stem = parse_stem(stem)
     if len(args) == 0:
         return stem
     else:
+        pos = stem.pos
         for argset in args:
             if hasattr(argset, 'type') and argset.type == 'bang':
                 stem = Call(stem, [])
@@ -256,9 +311,23 @@ def parse_call(t):
                 stem = Attr(stem, argset[1].value)
             else:
                 stem = Call(stem, argset)
+            stem.pos = pos
         return stem
 
 
+def located(p):
+    """Wrap a parser of expressions so that it sets the position of the nodes it
+       returns to that of their first token, unless they already have one."""
+    from funcparserlib.parser import Parser
+
+    def _run(tokens, s):
+        value, s2 = p.run(tokens, s)
+        if value.pos is None:
+            value.pos = tokens[s.pos].start
+        return value, s2
+    return Parser(_run)
+
+
 def parse_def(t):
     args, body = t
     if args is None:
@@ -270,50 +339,79 @@ def parse_def(t):
 def parse_defargs(t):
     return [t[0].value] + [x.value for x in t[1]]
 
-expr = fwd()
+_toplevel = None
+
+
+def grammar():
+    """The parser of whole programs, built the first time it is needed."""
+    global _toplevel
+    if _toplevel is not None:
+        return _toplevel
+    from funcparserlib.parser import forward_decl as fwd, finished as eof, many, maybe, skip
+    string, floatn, intn, ident, dot, comma, bang, eq, lrb, rrb = map(
+        tok, ('string', 'floatn', 'intn', 'ident', 'dot', 'comma', 'bang', 'eq', 'lrb', 'rrb'))
+
+    expr = fwd()
+
+    args = expr + many(skip(comma) + expr) >> parse_args
+
+    literal = string | floatn | intn
+
+    brackets = skip(lrb) + expr + skip(rrb)
+
+    call_ = (skip(lrb) + args + skip(rrb)) | bang
+    attr_ = dot + ident
+    call = (literal | ident | brackets) + many(call_ | attr_) >> parse_call
+
+    block = skip(keyword('do')) + many(expr) + skip(keyword('end')) >> Block
 
-args = expr + many(skip(comma) + expr) >> parse_args
+    ifexpr = skip(keyword('if')) + expr + expr + \
+        maybe(skip(keyword('else')) + expr) >> (lambda t: IfExpr(*t))
 
-literal = string | floatn | intn
+    varexpr = skip(keyword('let')) + maybe(keyword('mut')) + ident + skip(eq) + \
+        expr >> (lambda t: VarExpr(*t))
 
-brackets = skip(lrb) + expr + skip(rrb)
+    whileexpr = skip(keyword('while')) + expr + expr >> (lambda t: WhileExpr(*t))
 
-call_ = (skip(lrb) + args + skip(rrb)) | bang
-attr_ = dot + ident
-call = (literal | ident | brackets) + many(call_ | attr_) >> parse_call
+    defargs = ident + many(skip(comma) + ident) >> parse_defargs
+    defexpr = skip(keyword('def')) + skip(lrb) + \
+        maybe(defargs) + skip(rrb) + expr >> parse_def
 
-block = skip(keyword('do')) + many(expr) + skip(keyword('end')) >> Block
+    tryexpr = skip(keyword('try')) + expr + \
+        skip(keyword('except')) + expr >> (lambda t: TryExpr(*t))
 
-ifexpr = skip(keyword('if')) + expr + expr + \
-    maybe(skip(keyword('else')) + expr) >> (lambda t: IfExpr(*t))
+    breakexpr = skip(keyword('break')) >> (lambda t: BreakExpr())
 
-varexpr = skip(keyword('let')) + maybe(keyword('mut')) + ident + skip(eq) + \
-    expr >> (lambda t: VarExpr(*t))
+    returnexpr = skip(keyword('return')) + expr >> ReturnExpr
 
-whileexpr = skip(keyword('while')) + expr + expr >> (lambda t: WhileExpr(*t))
+    forexpr = skip(keyword('for')) + ident + skip(keyword('in')) + expr + expr >> (lambda t: ForExpr(*t))
 
-defargs = ident + many(skip(comma) + ident) >> parse_defargs
-defexpr = skip(keyword('def')) + skip(lrb) + \
-    maybe(defargs) + skip(rrb) + expr >> parse_def
+    modexpr = skip(keyword('module')) + skip(lrb) + \
+             maybe(defargs) + skip(rrb) + expr >> (lambda t: ModuleExpr(*t))
 
-tryexpr = skip(keyword('try')) + expr + \
-    skip(keyword('except')) + expr >> (lambda t: TryExpr(*t))
+    expr.define(located(breakexpr | returnexpr | call | brackets | block |
+                         ifexpr | varexpr | whileexpr | defexpr | tryexpr |
+                         forexpr | modexpr))
 
-breakexpr = skip(keyword('break')) >> (lambda t: BreakExpr())
+    _toplevel = expr + skip(eof)
+    return _toplevel
 
-returnexpr = skip(keyword('return')) + expr >> ReturnExpr
 
-forexpr = skip(keyword('for')) + ident + skip(keyword('in')) + expr + expr >> (lambda t: ForExpr(*t))
+BACKENDS = ('funcparserlib', 'fast')
 
-modexpr = skip(keyword('module')) + skip(lrb) + \
-         maybe(defargs) + skip(rrb) + expr >> (lambda t: ModuleExpr(*t))
+parser_backend = 'funcparserlib'
 
-expr.define((breakexpr | returnexpr | call | brackets | block |
-             ifexpr | varexpr | whileexpr | defexpr | tryexpr |
-             forexpr | modexpr))
 
-toplevel = expr + skip(eof)
+def set_backend(name):
+    """Select the parser used by parse: 'funcparserlib' or the hand-written 'fast' parser."""
+    global parser_backend
+    if name not in BACKENDS:
+        raise ValueError("Unknown parser backend '%s'!" % name)
+    parser_backend = name
 
 
-def parse(s):
-    return toplevel.parse(tokenize(s + "\n"))
+def parse(s, backend=None):
+    if (backend or parser_backend) == 'fast':
+        from pyre.rdparser import parse as fast_parse
+        return fast_parse(s)
+    return grammar().parse(tokenize(s + "\n"))
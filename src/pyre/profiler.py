@@ -0,0 +1,222 @@
+"""
+(c) Tuomas Laakkonen 2015, under the MIT license.
+
+pyre.profiler
+
+A profiler for Pyre programs. While it runs, it counts and times each call of
+a function defined in Pyre, under either evaluator, and each node of the tree
+the AST evaluator evaluates. It also counts the Pyre objects made of each type.
+Nodes and functions are named by the (line, column) the parser recorded for
+them.
+
+The results can be written as a flat report sorted by self time, or as
+collapsed stacks which flamegraph tools read. Each collapsed stack is one line:
+the Pyre functions that were being called, separated by semicolons, and the
+microseconds spent in the innermost of them.
+
+Only the thread which starts the profiler is profiled.
+"""
+
+from pyre import asteval, vm
+from pyre.objspace import PyreObject, PyrePyFunc
+from pyre.parser import Block, Call, DefExpr, IfExpr, ReturnExpr, Seq
+import collections
+import threading
+import time
+
+
+# The nodes asteval._eval_tail evaluates itself, rather than passing them to _eval.
+_TAIL_NODES = (Call, IfExpr, Block, Seq, ReturnExpr)
+
+
+class Stats:
+    """The number of times a node or function ran, and the seconds spent in it,
+       with (total) and without (self) the nodes or functions it ran in turn."""
+    __slots__ = ('count', 'total', 'self', 'depth')
+
+    def __init__(self):
+        self.count = 0
+        self.total = self.self = 0.0
+        self.depth = 0
+
+
+def _where(node):
+    return '%s:%s' % node.pos if node.pos is not None else '?'
+
+
+def node_label(node):
+    """Name a node by its type and where it starts."""
+    return '%s %s' % (node.type, _where(node))
+
+
+def function_label(node):
+    """Name a function by the variable it was assigned to and where it is defined.
+       A program's toplevel is given for the tree of the program."""
+    if isinstance(node, DefExpr):
+        return '%s %s' % (node.name or '<def>', _where(node))
+    return '<toplevel> %s' % _where(node)
+
+
+def _excerpt(node, width=40):
+    text = ' '.join(str(node).split())
+    return text if len(text) <= width else text[:width - 3] + '...'
+
+
+class Profiler:
+    """Collects the counts and times of a program. Use start and stop, or use it as
+       a context manager, around running the program."""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.nodes = {}
+        self.functions = {}
+        self.stacks = collections.Counter()
+        self.allocations = collections.Counter()
+        self._labels = {}
+        self._bodies = {}
+        self._frames = []
+        self._calls = []
+        self._thread = None
+        self._saved = None
+
+    def start(self):
+        self._thread = threading.get_ident()
+        self._saved = (asteval._eval, asteval._eval_tail, vm.run)
+        eval_node, eval_tail, run_code = self._saved
+        allocations = self.allocations
+
+        def _eval(expr, state):
+            if threading.get_ident() != self._thread:
+                return eval_node(expr, state)
+            return self._eval(eval_node, expr, state)
+
+        def _eval_tail(expr, state):
+            if threading.get_ident() != self._thread or type(expr) not in _TAIL_NODES:
+                return eval_tail(expr, state)
+            return self._eval(eval_tail, expr, state)
+
+        def _run(code, frame, state):
+            if code.node is None or threading.get_ident() != self._thread:
+                return run_code(code, frame, state)
+            self._enter(code.node)
+            try:
+                return run_code(code, frame, state)
+            finally:
+                self._leave()
+
+        def _new(cls, *args, **kwargs):
+            allocations[cls.__name__] += 1
+            return object.__new__(cls)
+
+        asteval._eval, asteval._eval_tail, vm.run = _eval, _eval_tail, _run
+        vm.tracer = self
+        PyreObject.__new__ = PyrePyFunc.__new__ = staticmethod(_new)
+        return self
+
+    def stop(self):
+        asteval._eval, asteval._eval_tail, vm.run = self._saved
+        vm.tracer = None
+        del PyreObject.__new__, PyrePyFunc.__new__
+        while self._calls:
+            self._leave()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _eval(self, eval_node, expr, state):
+        if type(expr) is DefExpr:
+            self._bodies[expr.body] = expr
+        func = self._bodies.get(expr)
+        if func is None and not self._calls:
+            func = expr
+        if func is not None:
+            self._enter(func)
+        stats = self.nodes.get(expr)
+        if stats is None:
+            stats = self.nodes[expr] = Stats()
+        frames = self._frames
+        frame = [0.0]
+        frames.append(frame)
+        stats.depth += 1
+        start = self.clock()
+        try:
+            return eval_node(expr, state)
+        finally:
+            elapsed = self.clock() - start
+            frames.pop()
+            if frames:
+                frames[-1][0] += elapsed
+            stats.count += 1
+            stats.self += elapsed - frame[0]
+            stats.depth -= 1
+            if not stats.depth:
+                stats.total += elapsed
+            if func is not None:
+                self._leave()
+
+    def enter(self, node):
+        """Called by the VM when it calls a function inline."""
+        if threading.get_ident() == self._thread:
+            self._enter(node)
+
+    def leave(self):
+        """Called by the VM when it returns from a function called inline."""
+        if threading.get_ident() == self._thread:
+            self._leave()
+
+    def _enter(self, func):
+        stats = self.functions.get(func)
+        if stats is None:
+            stats = self.functions[func] = Stats()
+            self._labels[func] = function_label(func)
+        stats.depth += 1
+        stack = self._calls[-1][3] + (self._labels[func],) if self._calls else (self._labels[func],)
+        self._calls.append([stats, self.clock(), 0.0, stack])
+
+    def _leave(self):
+        stats, start, child, stack = self._calls.pop()
+        elapsed = self.clock() - start
+        if self._calls:
+            self._calls[-1][2] += elapsed
+        stats.count += 1
+        stats.self += elapsed - child
+        stats.depth -= 1
+        if not stats.depth:
+            stats.total += elapsed
+        self.stacks[stack] += elapsed - child
+
+    def run(self, func, *args):
+        """Call func with args while profiling, returning its result."""
+        with self:
+            return func(*args)
+
+    def report(self, file, limit=30):
+        """Write the flat report: functions and nodes sorted by self time, and allocations."""
+        def table(title, rows, label):
+            if not rows:
+                return
+            print('%s\n' % title, file=file)
+            print('%10s %10s %10s  %s' % ('count', 'total s', 'self s', label), file=file)
+            for name, stats in sorted(rows, key=lambda row: -row[1].self)[:limit]:
+                print('%10d %10.4f %10.4f  %s' % (stats.count, stats.total, stats.self, name),
+                      file=file)
+            print(file=file)
+
+        table('Functions', [(self._labels[func], stats) for func, stats in self.functions.items()],
+              'function')
+        table('Nodes', [('%-16s %s' % (node_label(node), _excerpt(node)), stats)
+                        for node, stats in self.nodes.items()], 'node')
+        print('Allocations\n', file=file)
+        print('%10s  %s' % ('count', 'type'), file=file)
+        for name, count in self.allocations.most_common():
+            print('%10d  %s' % (count, name), file=file)
+
+    def write_stacks(self, file):
+        """Write the collapsed stacks, with their self time in microseconds."""
+        for stack, seconds in sorted(self.stacks.items()):
+            micros = int(seconds * 1e6)
+            if micros:
+                print('%s %d' % (';'.join(stack), micros), file=file)
@@ -0,0 +1,416 @@
+"""
+(c) Tuomas Laakkonen 2015, under the MIT license.
+
+pyre.rdparser
+
+A hand-written parser for Pyre: a single pass, streaming lexer and a predictive
+recursive descent parser. It accepts the same grammar as the funcparserlib
+parser in pyre.parser and builds the same AST, but it never backtracks and only
+uses one Python frame per level of nesting. Select it with
+pyre.parser.set_backend('fast').
+
+Running this module checks that both parsers agree on some files:
+
+    python -m pyre.rdparser examples/*.pyr
+"""
+
+from pyre.parser import (
+    AstNode,
+    Name,
+    Number,
+    String,
+    Call,
+    Attr,
+    Block,
+    IfExpr,
+    VarExpr,
+    WhileExpr,
+    ForExpr,
+    DefExpr,
+    TryExpr,
+    BreakExpr,
+    ReturnExpr,
+    ModuleExpr,
+    unescape)
+import re
+import sys
+
+KEYWORDS = ('if', 'do', 'else', 'end', 'while', 'def', 'let', 'try',
+            'except', 'break', 'return', 'for', 'in', 'module', 'mut')
+
+# The alternatives are tried in order, like the token specs of pyre.parser.
+token_re = re.compile(r'''
+    (?P<skip>\s+|\#[^\r\n]*)
+  | (?P<keyword>(?:%s)(?!\w))
+  | (?P<floatn>-?[0-9]+\.[0-9]+)
+  | (?P<intn>-?[0-9]+)
+  | (?P<ident>[A-Za-z_$+\-*/][A-Za-z_0-9$+\-*/]*)
+  | (?P<string>"[^"]*?"|'[^']*?')
+  | (?P<dot>\.)
+  | (?P<comma>,)
+  | (?P<bang>!)
+  | (?P<eq>=)
+  | (?P<lrb>\()
+  | (?P<rrb>\))
+''' % '|'.join(KEYWORDS), re.VERBOSE)
+
+
+class ParseError(Exception):
+    """A syntax error. at_eof is set when the input ended before the expression did."""
+
+    def __init__(self, message, pos=None, at_eof=False):
+        if pos is not None:
+            message = '%s,%s: %s' % (pos[0], pos[1], message)
+        super().__init__(message)
+        self.pos = pos
+        self.at_eof = at_eof
+
+
+class Token:
+    """A token, with the (line, column) it starts at."""
+    __slots__ = ('type', 'value', 'pos')
+
+    def __init__(self, type, value, pos):
+        self.type, self.value, self.pos = type, value, pos
+
+    def __getstate__(self):
+        return (self.type, self.value, self.pos)
+
+    def __setstate__(self, state):
+        self.type, self.value, self.pos = state
+
+    def __repr__(self):
+        return 'Token(%r, %r)' % (self.type, self.value)
+
+
+def tokenize(s, line=1, pos=0):
+    """Lazily split a string into tokens, skipping whitespace and comments.
+       Tokenizing starts at pos, on the first line of s, which is numbered line."""
+    match = token_re.match
+    line_start, end = 0, len(s)
+    while pos < end:
+        m = match(s, pos)
+        if m is None:
+            # A string the input ends in the middle of.
+            unclosed = s[pos] in '"\'' and s.find(s[pos], pos + 1) < 0
+            raise ParseError('unexpected character %r' % s[pos], (line, pos - line_start + 1),
+                             at_eof=unclosed)
+        type = m.lastgroup
+        if type != 'skip':
+            yield Token(type, m.group(), (line, pos - line_start + 1))
+        newlines = s.count('\n', pos, m.end())
+        if newlines:
+            line += newlines
+            line_start = s.rindex('\n', pos, m.end()) + 1
+        pos = m.end()
+
+
+_EOF = Token('eof', None, None)
+
+
+class Parser:
+    """A predictive parser over a stream of tokens. Every alternative of the
+       grammar starts with a distinct token, so one token of lookahead suffices."""
+
+    def __init__(self, tokens):
+        self.tokens = iter(tokens)
+        self.tok = next(self.tokens, _EOF)
+
+    def advance(self):
+        tok = self.tok
+        self.tok = next(self.tokens, _EOF)
+        return tok
+
+    def error(self, expected):
+        if self.tok is _EOF:
+            raise ParseError('unexpected end of input, expected %s' % expected, at_eof=True)
+        raise ParseError('got unexpected token %r, expected %s' % (self.tok.value, expected),
+                         self.tok.pos)
+
+    def expect(self, type, value=None):
+        tok = self.tok
+        if tok.type != type or (value is not None and tok.value != value):
+            self.error(repr(value) if value is not None else type)
+        return self.advance()
+
+    def at(self, type, value=None):
+        return self.tok.type == type and (value is None or self.tok.value == value)
+
+    def expr(self):
+        tok = self.tok
+        if tok.type == 'keyword':
+            method = self.keyword_exprs.get(tok.value)
+            if method is None:
+                self.error('an expression')
+            self.advance()
+            node = method(self)
+            node.pos = tok.pos
+            return node
+        elif tok.type in ('ident', 'string', 'intn', 'floatn', 'lrb'):
+            return self.call()
+        self.error('an expression')
+
+    def call(self):
+        tok = self.advance()
+        if tok.type == 'lrb':
+            stem = self.expr()
+            self.expect('rrb')
+        else:
+            if tok.type == 'ident':
+                stem = Name(tok.value)
+            elif tok.type == 'string':
+                stem = String(unescape(tok.value[1:-1]))
+            else:
+                stem = Number(float(tok.value))
+            stem.pos = tok.pos
+        pos = stem.pos
+        while True:
+            type = self.tok.type
+            if type == 'lrb':
+                self.advance()
+                args = [self.expr()]
+                while self.at('comma'):
+                    self.advance()
+                    args.append(self.expr())
+                self.expect('rrb')
+                stem = Call(stem, args)
+            elif type == 'bang':
+                self.advance()
+                stem = Call(stem, [])
+            elif type == 'dot':
+                self.advance()
+                stem = Attr(stem, self.expect('ident').value)
+            else:
+                return stem
+            stem.pos = pos
+
+    def names(self):
+        self.expect('lrb')
+        names = []
+        if not self.at('rrb'):
+            names.append(self.expect('ident').value)
+            while self.at('comma'):
+                self.advance()
+                names.append(self.expect('ident').value)
+        self.expect('rrb')
+        return names
+
+    def block(self):
+        body = []
+        while not self.at('keyword', 'end'):
+            body.append(self.expr())
+        self.advance()
+        return Block(body)
+
+    def ifexpr(self):
+        cond = self.expr()
+        body = self.expr()
+        if self.at('keyword', 'else'):
+            self.advance()
+            return IfExpr(cond, body, self.expr())
+        return IfExpr(cond, body, None)
+
+    def varexpr(self):
+        mut = None
+        if self.at('keyword', 'mut'):
+            mut = self.advance()
+        var = self.expect('ident')
+        self.expect('eq')
+        return VarExpr(mut, var, self.expr())
+
+    def whileexpr(self):
+        cond = self.expr()
+        return WhileExpr(cond, self.expr())
+
+    def defexpr(self):
+        args = self.names()
+        return DefExpr(args, self.expr())
+
+    def tryexpr(self):
+        body = self.expr()
+        self.expect('keyword', 'except')
+        return TryExpr(body, self.expr())
+
+    def breakexpr(self):
+        return BreakExpr()
+
+    def returnexpr(self):
+        return ReturnExpr(self.expr())
+
+    def forexpr(self):
+        var = self.expect('ident')
+        self.expect('keyword', 'in')
+        expr = self.expr()
+        return ForExpr(var, expr, self.expr())
+
+    def modexpr(self):
+        args = self.names()
+        return ModuleExpr(args, self.expr())
+
+    keyword_exprs = {
+        'do': block,
+        'if': ifexpr,
+        'let': varexpr,
+        'while': whileexpr,
+        'def': defexpr,
+        'try': tryexpr,
+        'break': breakexpr,
+        'return': returnexpr,
+        'for': forexpr,
+        'module': modexpr
+    }
+
+
+def parse(s):
+    """Parse a whole program, which is a single expression."""
+    parser = Parser(tokenize(s))
+    tree = parser.expr()
+    if parser.tok is not _EOF:
+        parser.error('end of input')
+    return tree
+
+
+def _depth(s):
+    """How many more brackets and blocks s opens than it closes, or None if it
+       cannot be tokenized on its own (it is part of a string, say)."""
+    depth = 0
+    try:
+        for tok in tokenize(s):
+            if tok.type == 'lrb' or (tok.type == 'keyword' and tok.value == 'do'):
+                depth += 1
+            elif tok.type == 'rrb' or (tok.type == 'keyword' and tok.value == 'end'):
+                depth -= 1
+    except ParseError:
+        return None
+    return depth
+
+
+def _offset(s, line, pos):
+    """The index in s, whose first line is numbered line, of a (line, column) position."""
+    offset = 0
+    for _ in range(pos[0] - line):
+        offset = s.index('\n', offset) + 1
+    return offset + pos[1] - 1
+
+
+def _continuable(tree):
+    """Whether more tokens could continue a whole expression. Only one which ends
+       with the end of a block or a break, and has no if without an else at its end,
+       cannot be: anything else can be called or have an attribute taken."""
+    while True:
+        t = type(tree)
+        if t is Block or t is BreakExpr:
+            return False
+        elif t is IfExpr:
+            if tree.elsebody is None:
+                return True
+            tree = tree.elsebody
+        elif t is TryExpr:
+            tree = tree.exceptbody
+        elif t is VarExpr or t is ReturnExpr:
+            tree = tree.value
+        elif t is WhileExpr or t is ForExpr or t is DefExpr or t is ModuleExpr:
+            tree = tree.body
+        else:
+            return True
+
+
+def _parse_first(s, line, start, complete, final):
+    """Parse the first expression of s after start, returning it and where it ends,
+       or None if s might not hold all of it yet: it is unfinished, or ends s and,
+       unless complete, could be continued (see _continuable). final is set when
+       nothing more will be added to s."""
+    parser = Parser(tokenize(s, line, start))
+    if parser.tok is _EOF:
+        return None
+    try:
+        tree = parser.expr()
+    except ParseError as e:
+        if e.at_eof and not final:
+            return None
+        raise
+    if parser.tok is _EOF:
+        if not (complete or final) and _continuable(tree):
+            return None
+        return tree, len(s)
+    return tree, _offset(s, line, parser.tok.pos)
+
+
+def parse_stream(lines):
+    """Parse a program given as an iterable of lines, such as a file, yielding each
+       of its toplevel expressions as soon as it has been read: a program can be
+       any number of expressions. One which ends a line is yielded straight away
+       if nothing could continue it, such as a do block; otherwise, it is only
+       known to be whole once the next token, a blank line or the end of the input
+       is read."""
+    # The lines read but not parsed yet start at line, and the first of them at start.
+    parts, line, start, depth = [], 1, 0, 0
+    final = False
+    lines = iter(lines)
+    while not final:
+        text = next(lines, None)
+        if text is None:
+            final = True
+        else:
+            parts.append(text)
+            if depth is not None:
+                more = _depth(text)
+                depth = depth + more if more is not None else None
+            # Nothing can end inside an unclosed bracket or block.
+            if depth is not None and depth > 0:
+                continue
+        complete = final or not text.strip()
+        source = ''.join(parts)
+        while True:
+            first = _parse_first(source, line, start, complete, final)
+            if first is None:
+                break
+            tree, end = first
+            yield tree
+            cut = source.rfind('\n', 0, end) + 1
+            line += source.count('\n', 0, cut)
+            source, start = source[cut:], end - cut
+            depth = _depth(source[start:])
+        parts = [source]
+
+
+def same_tree(a, b):
+    """Structurally compare two ASTs (or parts of them), ignoring the token classes used."""
+    if isinstance(a, AstNode) or isinstance(b, AstNode):
+        if type(a) is not type(b):
+            return False
+        names = set(vars(a)) | set(vars(b))
+        return all(same_tree(getattr(a, n, None), getattr(b, n, None)) for n in names)
+    elif isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(map(same_tree, a, b))
+    elif hasattr(a, 'type') and hasattr(b, 'type'):
+        return (a.type, a.value) == (b.type, b.value)
+    return a == b
+
+
+def conformance(source):
+    """Check that both parsers produce the same tree for source, or both reject it."""
+    from pyre.parser import parse as combinator_parse
+    from funcparserlib.lexer import LexerError
+    from funcparserlib.parser import NoParseError
+    try:
+        fast = parse(source)
+    except ParseError:
+        fast = None
+    try:
+        combinator = combinator_parse(source, 'funcparserlib')
+    except (LexerError, NoParseError):
+        combinator = None
+    if fast is None or combinator is None:
+        return fast is None and combinator is None
+    return same_tree(fast, combinator)
+
+
+if __name__ == '__main__':
+    failed = 0
+    for filename in sys.argv[1:]:
+        with open(filename) as f:
+            ok = conformance(f.read())
+        failed += not ok
+        print('%s %s' % ('ok  ' if ok else 'FAIL', filename))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,164 @@
+"""
+(c) Tuomas Laakkonen 2015, under the MIT license.
+
+pyre.resolver
+
+A lexical scope resolver for the Pyre AST, run by pyre.compiler after parsing.
+
+Every function body, module body and toplevel program gets a frame: a flat
+list whose first element is the frame it was created in, followed by one slot
+per variable it declares (its arguments, lets and for loop variables, including
+those in nested blocks, which merge into the enclosing scope). A slot holds
+None until the variable is bound, and then a [mutable, value] cell.
+
+Each Name, VarExpr and ForExpr is annotated with a Ref: the (depth, slot)
+pairs of every enclosing frame declaring that name, innermost first. At run
+time the first *bound* slot in the chain is used, falling back to the dynamic
+global scope by name, which reproduces the let/let mut rules of pyre_eval:
+a let rebinds (or refuses to rebind) any visible variable and only declares a
+new one if the name is not bound anywhere yet.
+
+Each DefExpr is also annotated with its captures: the names it (or a function
+nested in it) uses which are declared by an enclosing frame. These are the only
+variables of enclosing scopes a function made from it needs to keep.
+"""
+
+from pyre.parser import (
+    Name,
+    Call,
+    Attr,
+    IfExpr,
+    Block,
+    Seq,
+    VarExpr,
+    WhileExpr,
+    DefExpr,
+    TryExpr,
+    ReturnExpr,
+    ForExpr,
+    ModuleExpr)
+
+
+class Ref:
+    """A resolved variable reference."""
+    __slots__ = ('name', 'chain')
+
+    def __init__(self, name, chain):
+        self.name = name
+        self.chain = chain
+
+    def __repr__(self):
+        return '%s%r' % (self.name, self.chain)
+
+
+class Scope:
+    """The variables of one frame. Slot 0 of a frame holds its parent frame."""
+
+    def __init__(self, parent, args=()):
+        self.parent = parent
+        self.names = []
+        self.slots = {}
+        # Arguments take the first slots.
+        self.nargs = len(args)
+        for arg in args:
+            self.declare(arg)
+
+    def declare(self, name):
+        if name not in self.slots:
+            self.names.append(name)
+            self.slots[name] = len(self.names)
+        return self.slots[name]
+
+    def ref(self, name):
+        chain = []
+        scope, depth = self, 0
+        while scope is not None:
+            if name in scope.slots:
+                chain.append((depth, scope.slots[name]))
+            scope, depth = scope.parent, depth + 1
+        return Ref(name, tuple(chain))
+
+
+def children(expr):
+    """The direct subexpressions of an AST node."""
+    if isinstance(expr, Call):
+        return expr.args + [expr.value]
+    elif isinstance(expr, Attr):
+        return [expr.value]
+    elif isinstance(expr, IfExpr):
+        return [e for e in (expr.cond, expr.body, expr.elsebody) if e is not None]
+    elif isinstance(expr, (Block, Seq)):
+        return list(expr.value)
+    elif isinstance(expr, (VarExpr, ReturnExpr)):
+        return [expr.value]
+    elif isinstance(expr, WhileExpr):
+        return [expr.cond, expr.body]
+    elif isinstance(expr, ForExpr):
+        return [expr.expr, expr.body]
+    elif isinstance(expr, (DefExpr, ModuleExpr)):
+        return [expr.body]
+    elif isinstance(expr, TryExpr):
+        return [expr.body, expr.exceptbody]
+    return []
+
+
+def names_used(expr):
+    """Every variable name an expression refers to or binds, except for the
+       arguments of the functions defined in it (including expr itself)."""
+    names = set()
+    _names_used(expr, names)
+    return names
+
+
+def _names_used(expr, names):
+    if isinstance(expr, Name):
+        names.add(expr.value)
+    elif isinstance(expr, VarExpr):
+        names.add(expr.var)
+    elif isinstance(expr, ForExpr):
+        names.add(expr.var.value)
+    elif isinstance(expr, DefExpr):
+        names |= names_used(expr.body) - set(expr.args)
+        return
+    for child in children(expr):
+        _names_used(child, names)
+
+
+def _declare(expr, scope):
+    if isinstance(expr, VarExpr):
+        scope.declare(expr.var)
+    elif isinstance(expr, ForExpr):
+        scope.declare(expr.var.value)
+    elif isinstance(expr, (DefExpr, ModuleExpr)):
+        return
+    for child in children(expr):
+        _declare(child, scope)
+
+
+def _resolve(expr, scope):
+    if isinstance(expr, Name):
+        expr.ref = scope.ref(expr.value)
+    elif isinstance(expr, VarExpr):
+        expr.ref = scope.ref(expr.var)
+    elif isinstance(expr, ForExpr):
+        expr.ref = scope.ref(expr.var.value)
+    elif isinstance(expr, DefExpr):
+        expr.captures = tuple(sorted(name for name in names_used(expr) if scope.ref(name).chain))
+        expr.scope = _resolve_frame(expr.body, Scope(scope, expr.args))
+        return
+    elif isinstance(expr, ModuleExpr):
+        expr.scope = _resolve_frame(expr.body, Scope(scope))
+        return
+    for child in children(expr):
+        _resolve(child, scope)
+
+
+def _resolve_frame(body, scope):
+    _declare(body, scope)
+    _resolve(body, scope)
+    return scope
+
+
+def resolve(tree):
+    """Resolve every variable reference in a program, returning its toplevel Scope."""
+    return _resolve_frame(tree, Scope(None))
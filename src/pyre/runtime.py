@@ -7,6 +7,7 @@ An implementation of Pyre's builtin functions.
 """
 
 from pyre.asteval import pyre_eval, pyre_to_py_val, State
+from pyre.vm import vm_eval
 from pyre.objspace import (
     PyreString,
     PyreNumber,
@@ -15,16 +16,91 @@ from pyre.objspace import (
     Pyre_FALSE,
     Pyre_NONE,
     PyrePyFunc,
-    PyreList)
+    PyreList,
+    PyreStopIteration,
+    pyre_freeze)
 from pyre.parser import parse
+from pyre.cache import parse_file
+from pyre.optimizer import optimize
 from functools import partial
+import contextlib
 import sys
+import threading
 
-STDLIB_PY_MODULES = ['io', 'list', 'import', 'exts']
-STDLIB_PYRE_MODULES = ['dict']
+STDLIB_PY_MODULES = ['io', 'list', 'string', 'dict', 'import', 'exts']
+STDLIB_PYRE_MODULES = []
+
+EVALUATORS = {
+    'ast': pyre_eval,
+    'vm': vm_eval
+}
+
+evaluator = 'ast'
+
+# Whether pyre_run optimizes trees with pyre.optimizer before evaluating them.
+optimizing = True
 
 global_state = State()
 
+# Modules loaded by import, keyed on their absolute path, and the locks which
+# stop two threads loading the same one at once (see module_lock).
+modules = {}
+_module_locks = {}
+_module_locks_lock = threading.Lock()
+
+# The evaluator, optimizer setting and global scope chosen for the code running
+# on each thread (see settings), which are used instead of the ones above.
+_local = threading.local()
+
+# Trees from pyre.cache are shared, and optimizing one changes it in place.
+_optimize_lock = threading.Lock()
+
+def set_evaluator(name):
+    """Select the evaluator used by pyre_run: 'ast' walks the tree directly,
+       'vm' compiles it to bytecode for pyre.vm."""
+    global evaluator
+    if name not in EVALUATORS:
+        raise ValueError("Unknown evaluator '%s'!" % name)
+    evaluator = name
+
+def set_optimize(flag):
+    """Turn the optimizer run by pyre_run on or off."""
+    global optimizing
+    optimizing = flag
+
+@contextlib.contextmanager
+def settings(name, flag, state=None):
+    """Make pyre_run, and so eval and import, use the evaluator name and optimize
+       if flag is set, and eval run in a scope below state rather than the global
+       one, on this thread until the block ends."""
+    previous = getattr(_local, 'settings', None)
+    _local.settings = (name, flag, state if state is not None else global_state)
+    try:
+        yield
+    finally:
+        _local.settings = previous
+
+def current_settings():
+    """The evaluator, optimizer setting and global scope used on this thread."""
+    return getattr(_local, 'settings', None) or (evaluator, optimizing, global_state)
+
+def module_lock(path):
+    """The lock held while the module at path is loaded, so that it is only loaded once
+       when several threads import it at the same time."""
+    with _module_locks_lock:
+        lock = _module_locks.get(path)
+        if lock is None:
+            lock = _module_locks[path] = threading.Lock()
+        return lock
+
+def pyre_run(tree, state):
+    """Evaluate a parsed program with the selected evaluator, optimizing it first."""
+    name, flag, _ = current_settings()
+    if flag:
+        with _optimize_lock:
+            tree = optimize(tree)
+    return EVALUATORS[name](tree, state)
+
 def builtin_func(state, name, f=None):
     if f is None:
         return partial(builtin_func, state, name)
@@ -34,7 +110,7 @@ def builtin_func(state, name, f=None):
 
 @builtin_func(global_state, 'eval')
 def _eval(state, str):
-    return pyre_eval(parse(str.value), global_state.scope_down())
+    return pyre_run(parse(str.value), current_settings()[2].scope_down())
 
 @builtin_func(global_state, 'object')
 def _object(state, *args):
@@ -47,6 +123,10 @@ def _object(state, *args):
 def _error(state, message):
     raise Exception(message)
 
+@builtin_func(global_state, 'stopiter')
+def _stopiter(state):
+    raise PyreStopIteration()
+
 @builtin_func(global_state, 'id')
 def _id(state, *args):
     return args[0] if len(args) == 1 else args
@@ -55,10 +135,19 @@ global_state.locals['True'] = (False, Pyre_TRUE)
 global_state.locals['False'] = (False, Pyre_FALSE)
 global_state.locals['None'] = (None, Pyre_NONE)
 
+_stdlib_loaded = False
+
 def load_stdlib():
+    """Load the builtin modules into the global state, unless they already have been."""
+    global _stdlib_loaded
+    if _stdlib_loaded:
+        return
+    _stdlib_loaded = True
     for mod_name in STDLIB_PY_MODULES:
          __import__("pyre.includes.%s" % mod_name)
     
     for mod_name in STDLIB_PYRE_MODULES:
-        with open("%s/includes/%s.pyr" % (__file__[:-11], mod_name), "r") as f:
-            pyre_eval(parse(f.read()), global_state)
+        pyre_run(parse_file("%s/includes/%s.pyr" % (__file__[:-11], mod_name)), global_state)
+    # The builtins are shared by every program, so none may change them.
+    for cell in global_state.locals.items.values():
+        pyre_freeze(cell[1])
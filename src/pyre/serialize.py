@@ -0,0 +1,126 @@
+"""
+(c) Tuomas Laakkonen 2015, under the MIT license.
+
+pyre.serialize
+
+Pickling of Pyre values, so they can be sent to other processes.
+
+A function defined in Pyre is pickled as its DefExpr together with the cells
+of the variables it captures, and is rebuilt by evaluating the DefExpr again
+in a new scope holding those cells. Builtins (including stdin) are pickled by
+their global name, and the shared constants by their value, so that they are
+looked up again in the process loading them; Python and extension modules are
+imported again.
+Captured cells are copied, so rebinding a captured variable in one process is
+not seen by the others.
+"""
+
+from pyre.objspace import (
+    _NO_ATTRS,
+    _FROZEN,
+    Pyre_NONE,
+    PyrePyFunc,
+    PyreNumber,
+    PyreString,
+    PyreBytes,
+    PyreBuffer,
+    PyreModule,
+    ProxyDict,
+    pyre_constant,
+    pyre_module_proxy)
+from pyre.resolver import names_used
+from pyre.runtime import EVALUATORS, global_state
+from pyre.asteval import Function
+from pyre.vm import Closure, _find_cell
+from types import MappingProxyType
+import importlib
+import io
+import pickle
+
+_SHARED = {'_NO_ATTRS': _NO_ATTRS, '_FROZEN': _FROZEN, 'Pyre_NONE': Pyre_NONE}
+
+
+def _shared(name):
+    return _SHARED[name]
+
+
+def _builtin(name):
+    return global_state.locals[name][1]
+
+
+def _new_function(expr, evaluator):
+    return EVALUATORS[evaluator](expr, global_state.scope_down())
+
+
+def _frozen_dict(d):
+    return MappingProxyType(d)
+
+
+def _py_module(name, convert):
+    return pyre_module_proxy(importlib.import_module(name), convert)
+
+
+def _bind(func, captured):
+    state = func.defn[1]
+    for name, cell in captured.items():
+        state.locals.items[name] = cell
+
+
+def _lookup(func, name):
+    expr, state, frame = func.defn
+    if type(func.func) is Function and func.func.outer is not None:
+        func.func.resolve()
+    if frame is not None:
+        return _find_cell(expr.scope.parent.ref(name), frame, state)
+    return state.locals[name] if name in state.locals else None
+
+
+def captured(func):
+    """The cells of the variables a Pyre function refers to, other than the builtins."""
+    builtins = global_state.locals.items
+    cells = {}
+    for name in names_used(func.defn[0]):
+        cell = _lookup(func, name)
+        if cell is not None and builtins.get(name) is not cell:
+            cells[name] = cell
+    return cells
+
+
+class Pickler(pickle.Pickler):
+    """A pickler which knows about functions, builtins and shared constants."""
+
+    def reducer_override(self, obj):
+        t = type(obj)
+        if t is PyrePyFunc and obj.defn is not None:
+            name = 'vm' if type(obj.func) is Closure else 'ast'
+            return (_new_function, (obj.defn[0], name), captured(obj),
+                    None, None, _bind)
+        elif t is PyrePyFunc or t is PyreBuffer:
+            for name, cell in global_state.locals.items.items():
+                if cell[1] is obj:
+                    return (_builtin, (name,))
+        elif t is PyreNumber or t is PyreString:
+            return (pyre_constant, (obj.value,))
+        elif t is PyreBytes and type(obj.value) is memoryview:
+            return (PyreBytes, (obj.value.tobytes(),))
+        elif t is PyreModule and type(obj.dict) is ProxyDict:
+            return (_py_module, (obj.dict.obj.__name__, obj.dict.convert))
+        elif obj is _NO_ATTRS or obj is _FROZEN or obj is Pyre_NONE:
+            for name, value in _SHARED.items():
+                if value is obj:
+                    return (_shared, (name,))
+        elif t is MappingProxyType:
+            return (_frozen_dict, (dict(obj),))
+        return NotImplemented
+
+
+def dumps(value):
+    """Pickle a Pyre value into bytes."""
+    f = io.BytesIO()
+    Pickler(f, pickle.HIGHEST_PROTOCOL).dump(value)
+    return f.getvalue()
+
+
+def loads(data):
+    """Unpickle a Pyre value. The standard library must be loaded first."""
+    return pickle.loads(data)
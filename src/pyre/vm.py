@@ -0,0 +1,394 @@
+"""
+(c) Tuomas Laakkonen 2015, under the MIT license.
+
+pyre.vm
+
+A stack based virtual machine which runs the bytecode produced by pyre.compiler.
+It shares its calling conventions, mutability rules and object space with
+pyre.asteval, so the two evaluators can be used interchangeably.
+
+Local variables live in array backed frames (see pyre.resolver), and only
+names which are not declared anywhere in the program are looked up in the
+dynamic State it is run in.
+
+A function keeps copies of the frames enclosing its definition which hold just
+the cells of the variables it captures (see pyre.resolver), not the frames
+themselves, so that it does not keep the rest of their variables alive.
+
+Calls of functions defined in Pyre do not recurse in Python: run saves the
+caller on its own stack of frames and carries on with the callee, so the depth
+of recursion is only limited by memory. A call in tail position replaces the
+caller's frame instead, so tail recursion runs in constant space.
+"""
+
+from pyre.compiler import *
+from pyre.compiler import compile as pyre_compile
+from pyre.asteval import (
+    pyre_call,
+    pyre_call_method,
+    pyre_getattr,
+    pyre_truthy,
+    pyre_iter,
+    BreakError)
+from pyre.objspace import PyreString, PyreList, PyreModule, PyrePyFunc
+
+_LOOP, _TRY = 0, 1
+_done = object()
+
+# An object told of each call made inline by run, with enter(node) where node
+# is the called function's DefExpr, and of each return from one with leave(),
+# such as a pyre.profiler.Profiler; or None.
+tracer = None
+
+
+class Shadow(list):
+    """A copy of a frame enclosing a function's definition, holding only the
+       cells the function captures. Those which were not bound when it was
+       made are found in the frame it copies, origin, once they are; origin
+       is let go when all of them have been."""
+    __slots__ = ('origin', 'pending')
+
+    def fill(self, slot):
+        """The cell in slot, found in origin if this does not have it yet, or None."""
+        cell = self[slot]
+        if cell is None and self.origin is not None:
+            origin = self.origin
+            cell = origin.fill(slot) if type(origin) is Shadow else origin[slot]
+            if cell is not None:
+                self[slot] = cell
+                self.pending -= 1
+                if not self.pending:
+                    self.origin = None
+        return cell
+
+
+def _shadow(plan, frame):
+    """Copy the frames enclosing a new function, keeping the slots in plan: the
+       slots it captures from each of them, innermost first, and their sizes.
+       Past the frame it is defined in, the enclosing function's own Shadow
+       already holds every cell it can capture, so that is shared instead."""
+    if not plan:
+        return None
+    head = last = None
+    for slots, size in plan:
+        if type(frame) is Shadow:
+            last[0] = frame
+            break
+        shadow = Shadow([None] * size)
+        shadow.pending = 0
+        for slot in slots:
+            cell = frame[slot]
+            if cell is None:
+                shadow.pending += 1
+            shadow[slot] = cell
+        shadow.origin = frame if shadow.pending else None
+        if last is None:
+            head = shadow
+        else:
+            last[0] = shadow
+        last = shadow
+        frame = frame[0]
+    return head
+
+
+def _find_cell(ref, frame, state, start=0):
+    """Find the innermost bound cell of a variable, or None if it is not bound."""
+    depth = 0
+    for level, slot in ref.chain[start:]:
+        while depth < level:
+            frame = frame[0]
+            depth += 1
+        cell = frame.fill(slot) if type(frame) is Shadow else frame[slot]
+        if cell is not None:
+            return cell
+    if ref.name in state.locals:
+        return state.locals[ref.name]
+    return None
+
+
+def _load(ref, frame, state):
+    cell = _find_cell(ref, frame, state)
+    if cell is None:
+        raise NameError('No such variable "%s"!' % ref.name)
+    return cell[1]
+
+
+class Closure:
+    """The Python callable of a function defined in Pyre: its Code object, the
+       Shadow of the frame it was defined in (None if it captures nothing) and
+       the State it was defined in."""
+    __slots__ = ('code', 'frame', 'state')
+
+    def __init__(self, code, frame, state):
+        self.code = code
+        self.frame = frame
+        self.state = state
+
+    def bind(self, args):
+        """Make a new frame below the defining one for a call with args."""
+        nargs = len(self.code.args)
+        if len(args) > nargs:
+            raise TypeError('Too many arguments supplied! Should be %s.' % nargs)
+        if len(args) < nargs:
+            raise TypeError('Not enough arguments supplied!')
+        dframe = [self.frame]
+        for arg in args:
+            dframe.append([False, arg])
+        dframe.extend([None] * (len(self.code.names) - nargs))
+        return dframe
+
+    def __call__(self, *args):
+        return run(self.code, self.bind(args), self.state)
+
+
+def _closure(func):
+    """The Closure of a Pyre function which run can call inline, or None."""
+    if type(func) is PyrePyFunc and type(func.func) is Closure and '__call__' not in func.dict:
+        return func.func
+    return None
+
+
+def _method_closure(obj, name):
+    """The Closure of an attribute of obj's own which run can call inline, or None."""
+    d = obj.dict
+    if d and '__getallattr__' not in d and name in d:
+        return _closure(d[name])
+    return None
+
+
+def _unwind(blocks, kind):
+    """Pop blocks up to the innermost one of kind, returning it, or None if there is none."""
+    while blocks:
+        block = blocks.pop()
+        if block[0] == kind:
+            return block
+    return None
+
+
+def make_function(code, frame, state):
+    """Create a Pyre function which runs code in a new frame below a copy of frame."""
+    shadow = _shadow(code.captures, frame)
+    return PyrePyFunc(Closure(code, shadow, state), (code.node, state, shadow))
+
+
+def run(code, frame, state):
+    """Run a Code object in frame, returning the value of its RETURN instruction.
+       state is the dynamic scope used for global variables."""
+    ops = code.ops
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    blocks = []
+    pc = 0
+    # The callers of the function being run, as (code, frame, state, stack, blocks, pc).
+    calls = []
+    while True:
+        try:
+            while True:
+                op, arg = ops[pc]
+                pc += 1
+                if op == LOAD_FAST:
+                    cell = frame[arg[0]]
+                    push(cell[1] if cell is not None else _load(arg[1], frame, state))
+                elif op == CALL_METHOD:
+                    obj = pop()
+                    name, nargs, cache = arg
+                    if nargs:
+                        args = stack[-nargs:]
+                        del stack[-nargs:]
+                    else:
+                        args = []
+                    cls, method = cache[0]
+                    if not obj.dict and type(obj) is cls:
+                        push(method(obj, *args))
+                    else:
+                        callee = _method_closure(obj, name)
+                        if callee is None:
+                            push(pyre_call_method(obj, name, args, cache))
+                        else:
+                            dframe = callee.bind(args)
+                            calls.append((code, frame, state, stack, blocks, pc))
+                            code, frame, state = callee.code, dframe, callee.state
+                            ops = code.ops
+                            stack = []
+                            push = stack.append
+                            pop = stack.pop
+                            blocks = []
+                            pc = 0
+                            if tracer is not None:
+                                tracer.enter(code.node)
+                elif op == ATTR:
+                    stack[-1] = pyre_getattr(stack[-1], arg)
+                elif op == CALL:
+                    stem = pop()
+                    if arg:
+                        args = stack[-arg:]
+                        del stack[-arg:]
+                    else:
+                        args = []
+                    callee = _closure(stem)
+                    if callee is None:
+                        push(pyre_call(stem, args))
+                    else:
+                        dframe = callee.bind(args)
+                        calls.append((code, frame, state, stack, blocks, pc))
+                        code, frame, state = callee.code, dframe, callee.state
+                        ops = code.ops
+                        stack = []
+                        push = stack.append
+                        pop = stack.pop
+                        blocks = []
+                        pc = 0
+                        if tracer is not None:
+                            tracer.enter(code.node)
+                elif op == POP:
+                    pop()
+                elif op == CONST:
+                    push(arg)
+                elif op == LOAD_GLOBAL:
+                    try:
+                        push(state.locals[arg][1])
+                    except:
+                        raise NameError('No such variable "%s"!' % arg)
+                elif op == LOAD_DEREF:
+                    depth, slot, ref = arg
+                    outer = frame
+                    while depth:
+                        outer = outer[0]
+                        depth -= 1
+                    cell = outer[slot]
+                    push(cell[1] if cell is not None else _load(ref, frame, state))
+                elif op == JUMP_IF_FALSE:
+                    if not pyre_truthy(pop()):
+                        pc = arg
+                elif op == JUMP:
+                    pc = arg
+                elif op == RETURN:
+                    value = pop()
+                    if not calls:
+                        return value
+                    if tracer is not None:
+                        tracer.leave()
+                    code, frame, state, stack, blocks, pc = calls.pop()
+                    ops = code.ops
+                    push = stack.append
+                    pop = stack.pop
+                    push(value)
+                elif op == TAIL_CALL or op == TAIL_CALL_METHOD:
+                    obj = pop()
+                    if op == TAIL_CALL:
+                        name, nargs = None, arg
+                    else:
+                        name, nargs, cache = arg
+                    if nargs:
+                        args = stack[-nargs:]
+                        del stack[-nargs:]
+                    else:
+                        args = []
+                    callee = _closure(obj) if name is None else _method_closure(obj, name)
+                    if callee is None:
+                        push(pyre_call(obj, args) if name is None
+                             else pyre_call_method(obj, name, args, cache))
+                    else:
+                        frame = callee.bind(args)
+                        code, state = callee.code, callee.state
+                        ops = code.ops
+                        del stack[:], blocks[:]
+                        pc = 0
+                        if tracer is not None:
+                            tracer.leave()
+                            tracer.enter(code.node)
+                elif op == LET:
+                    slot, ref, mut = arg
+                    cell = frame[slot]
+                    if cell is None:
+                        cell = _find_cell(ref, frame, state, 1)
+                    if cell is None:
+                        frame[slot] = [mut, stack[-1]]
+                    elif cell[0] == True:
+                        cell[1] = stack[-1]
+                    else:
+                        raise NameError("Variable '%s' is immutable!" % ref.name)
+                elif op == APPEND:
+                    value = pop()
+                    stack[-arg].values.append(value)
+                elif op == FOR_ITER:
+                    value = next(stack[-1], _done)
+                    if value is _done:
+                        pc = arg
+                    else:
+                        push(value)
+                elif op == FOR_VAR:
+                    # A loop keeps one cell for its variable, so that closures
+                    # made in its body see it change.
+                    cell = frame[arg]
+                    if type(cell) is list and cell[0] is False:
+                        cell[1] = pop()
+                    else:
+                        frame[arg] = [False, pop()]
+                elif op == NONE:
+                    push(None)
+                elif op == FUNCTION:
+                    push(make_function(arg, frame, state))
+                elif op == NEW_LIST:
+                    push(PyreList([]))
+                elif op == GET_ITER:
+                    stack[-1] = pyre_iter(stack[-1])
+                elif op == SETUP_LOOP:
+                    blocks.append((_LOOP, arg, len(stack)))
+                elif op == SETUP_TRY:
+                    blocks.append((_TRY, arg, len(stack)))
+                elif op == POP_BLOCK:
+                    blocks.pop()
+                elif op == BREAK:
+                    kind, target, depth = _unwind(blocks, _LOOP)
+                    del stack[depth:]
+                    pc = target
+                elif op == BREAK_RAISE:
+                    raise BreakError()
+                elif op == MODULE:
+                    mcode, exports = arg
+                    mframe = [frame] + [None] * len(mcode.names)
+                    run(mcode, mframe, state)
+                    mod = PyreModule()
+                    for name, slot in exports:
+                        if mframe[slot] is not None:
+                            mod._setattr(PyreString(name), mframe[slot][1])
+                    push(mod)
+                else:
+                    raise TypeError("Unknown opcode %s!" % op)
+        except BaseException as e:
+            # A break unwinds to the innermost loop, even one in a calling
+            # function, and an error to the innermost try.
+            kind = _LOOP if isinstance(e, BreakError) else _TRY
+            while True:
+                block = _unwind(blocks, kind)
+                if block is not None:
+                    break
+                if not calls:
+                    raise
+                if tracer is not None:
+                    tracer.leave()
+                code, frame, state, stack, blocks, pc = calls.pop()
+            ops = code.ops
+            push = stack.append
+            pop = stack.pop
+            del stack[block[2]:]
+            pc = block[1]
+
+
+def vm_eval(tree, state):
+    """Compile and run a parsed program, the VM counterpart of pyre_eval.
+       Variables the program declares at its toplevel start out bound to any
+       existing variables of the same name in state, and are written back into
+       state afterwards, just as pyre_eval leaves them there."""
+    code = pyre_compile(tree)
+    frame = [None]
+    for name in code.names:
+        frame.append(state.locals[name] if name in state.locals else None)
+    try:
+        return run(code, frame, state)
+    finally:
+        for name, cell in zip(code.names, frame[1:]):
+            if cell is not None:
+                state.locals[name] = cell
@@ -0,0 +1,28 @@
+"""
+(c) Tuomas Laakkonen 2015, under the MIT license.
+
+tests/support.py
+
+Helpers for the tests: running Pyre programs and collecting what they print.
+"""
+
+from contextlib import redirect_stdout
+import io
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.setrecursionlimit(10000)
+
+from pyre.interpreter import Interpreter
+
+EVALUATORS = ('ast', 'vm')
+
+
+def run(source, evaluator='ast', optimizing=True):
+    """Run a program in a new context, returning what it printed."""
+    output = io.StringIO()
+    with redirect_stdout(output):
+        Interpreter(evaluator, optimizing).context().run(source)
+    return output.getvalue()
@@ -0,0 +1,29 @@
+from support import EVALUATORS, run
+import pytest
+
+
+@pytest.mark.parametrize('evaluator', EVALUATORS)
+def test_keys_and_values_are_lists(evaluator):
+    source = '''do
+        let d = dict!
+        d.set("a", 1)
+        d.set("b", 2)
+        print(d.keys, d.values, d.values.get(d.keys.index("b")))
+    end'''
+    assert run(source, evaluator) == "('a', 'b') (1, 2) 2\n"
+
+
+@pytest.mark.parametrize('evaluator', EVALUATORS)
+def test_keys_equal_by_value_are_found(evaluator):
+    source = '''do
+        let d = dict!
+        d.set(array(1, 2), "array")
+        d.set(range(0, 2), "range")
+        let inner = dict!
+        inner.set("a", 1)
+        d.set(inner, "dict")
+        let other = dict!
+        other.set("a", 1)
+        print(d.get(array(1, 2)), d.get(list(0, 1)), d.get(other), d.has(array(1, 3)))
+    end'''
+    assert run(source, evaluator) == 'array range dict 0\n'
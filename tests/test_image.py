@@ -0,0 +1,33 @@
+import pickle
+
+import pytest
+
+from support import run
+from pyre import image, runtime
+
+
+@pytest.fixture
+def modules():
+    saved = dict(runtime.modules)
+    yield runtime.modules
+    runtime.modules.clear()
+    runtime.modules.update(saved)
+
+
+def test_image_restores_preloaded_modules(tmp_path, modules):
+    filename = str(tmp_path / 'pyre.img')
+    image.save(filename, ['string'])
+    path = next(path for path in modules if path.endswith('string.pyr'))
+    module = modules.pop(path)
+    assert image.load(filename, ['string'])
+    assert modules[path] is not module
+    assert run('print(import("string").letters.len!)') == '52\n'
+    assert not image.load(filename, ['parsec'])
+
+
+def test_damaged_image_is_not_restored(tmp_path, modules):
+    filename = str(tmp_path / 'pyre.img')
+    with open(filename, 'wb') as f:
+        pickle.dump(image._version(), f, pickle.HIGHEST_PROTOCOL)
+        f.write(b'not an image')
+    assert not image.load(filename)
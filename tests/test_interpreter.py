@@ -0,0 +1,71 @@
+from contextlib import redirect_stdout
+import io
+import threading
+
+import pytest
+
+from support import EVALUATORS
+from pyre.interpreter import Interpreter
+
+TAMPER = '''do
+    let attempt = def (value, name)
+        try do value.setattr(name, def (x) "hijacked") "changed" end except "refused"
+    print(attempt(print, "x"), attempt(range, "x"), attempt(True, "x"), attempt(None, "x"),
+          attempt(2.add(2), "add"), attempt("a", "concat"), attempt(import("string"), "letters"),
+          attempt(loadex("pyre.exts.eventloop"), "running"))
+end'''
+
+CHECK = '''do
+    let n = 4
+    print(n.add(1), "a".concat("b"), import("string").letters.len!, loadex("pyre.exts.eventloop").running!,
+          try print.x except "no x", try True.x except "no x", try None.x except "no x")
+end'''
+
+
+def _run(context, source):
+    output = io.StringIO()
+    with redirect_stdout(output):
+        context.run(source)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize('evaluator', EVALUATORS)
+def test_context_cannot_change_what_contexts_share(evaluator):
+    interp = Interpreter(evaluator)
+    assert _run(interp.context(), TAMPER) == ' '.join(['refused'] * 8) + '\n'
+    expected = '5 ab 52 0 no x no x no x\n'
+    assert _run(interp.context(), CHECK) == expected
+    assert _run(Interpreter(evaluator).context(), CHECK) == expected
+
+
+@pytest.mark.parametrize('evaluator', EVALUATORS)
+def test_eval_sees_the_variables_of_its_context(evaluator):
+    interp = Interpreter(evaluator)
+    first, second = interp.context(), interp.context()
+    first.run('let x = 5')
+    second.run('let x = 7')
+    assert _run(first, 'print(eval("x.add(1)"))') == '6\n'
+    assert _run(second, 'print(eval("x.add(1)"))') == '8\n'
+    assert _run(interp.context(), 'print(try eval("x") except "no x")') == 'no x\n'
+
+
+def test_module_imported_by_many_contexts_at_once_is_loaded_once(tmp_path, monkeypatch):
+    (tmp_path / 'slow_module.pyr').write_text('''module (total) do
+        print("loading")
+        let total = sum(range(0, 20000).map(def (x) x.mul(2)))
+    end''')
+    monkeypatch.chdir(tmp_path)
+    interp = Interpreter()
+    results = []
+
+    def load():
+        results.append(interp.context().run('import("slow_module").total'))
+    output = io.StringIO()
+    with redirect_stdout(output):
+        threads = [threading.Thread(target=load) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert output.getvalue() == 'loading\n'
+    assert len(results) == 8 and all(result.value == 399980000 for result in results)
@@ -0,0 +1,36 @@
+from support import EVALUATORS, run
+import pytest
+
+RANGES = '''do
+    print(range(0, 3), range(0, 3).str!)
+    print(sum(range(0, 10)), sum(list(1, 2)), sum(range(0, 4).lazy!))
+    print(range(0, 3).join(","), range(2, 5).index(3), range(0, 3).get(1), range(0, 3).len!)
+    print(range(0, 3).equals(list(0, 1, 2)), list(0, 1, 2).equals(range(0, 3)), range(0, 3).equals(range(0, 4)))
+end'''
+
+
+@pytest.mark.parametrize('evaluator', EVALUATORS)
+def test_range_behaves_like_a_list(evaluator):
+    assert run(RANGES, evaluator) == '(0, 1, 2) [0, 1, 2]\n45 3 6\n0,1,2 1 1 3\n1 1 0\n'
+
+
+MUTATED = '''do
+    let r = range(0, 3)
+    r.append(3)
+    r.set(0, 9)
+    print(r.pop!, r, r.len!)
+end'''
+
+
+@pytest.mark.parametrize('evaluator', EVALUATORS)
+def test_changing_a_range_makes_it_a_list(evaluator):
+    assert run(MUTATED, evaluator) == '3 (9, 1, 2) 3\n'
+
+
+@pytest.mark.parametrize('evaluator', EVALUATORS)
+def test_array_prints_like_a_list(evaluator):
+    source = '''do
+        let a = array(1, 2.5, 3)
+        print(a, list(a, 1), a.str!, list(1, 2.5, 3).str!)
+    end'''
+    assert run(source, evaluator) == '(1, 2.5, 3) ((1, 2.5, 3), 1) [1.0, 2.5, 3.0] [1.0, 2.5, 3.0]\n'
@@ -0,0 +1,31 @@
+from support import EVALUATORS, run
+import pytest
+
+ECHO = '''do
+    let net = import("net")
+    let ev = loadex("pyre.exts.eventloop")
+    let server = net.create_server(def (client)
+        client.on("data", def (line) client.write(line)))
+    server.listen("127.0.0.1", 0)
+    let port = server._server.port!
+    let mut replies = list!
+    let send = def (message)
+        net.connect("127.0.0.1", port, def (c) do
+            c.on("data", def (line) do
+                replies.append(line.equals(message))
+                c.close!
+                if replies.len!.equals(100) ev.stop!
+            end)
+            c.write(message)
+        end)
+    for i in range(0, 100)
+        send("hello ".concat(i.str!).concat("\\n"))
+    ev.wait!
+    server.stop!
+    print(replies.len!, replies.filter(def (ok) ok).len!)
+end'''
+
+
+@pytest.mark.parametrize('evaluator', EVALUATORS)
+def test_many_connections_to_an_echo_server(evaluator):
+    assert run(ECHO, evaluator) == '100 100\n'
@@ -0,0 +1,53 @@
+from contextlib import redirect_stdout
+import io
+
+import pytest
+
+from support import EVALUATORS, run
+from pyre.interpreter import Interpreter
+
+
+@pytest.mark.parametrize('evaluator', EVALUATORS)
+@pytest.mark.parametrize('optimizing', (True, False))
+def test_setattr_is_refused_on_every_number_and_string(evaluator, optimizing):
+    source = '''do
+        let f = def (x) x.add(0)
+        let refused = def (value)
+            try do value.setattr("add", def (x) "hijacked") "set" end except "refused"
+        print(refused(f(300)), refused(f(3)), refused(1000.mul(1000)), refused(5.gt(1)))
+        print(refused("a".concat("")), refused("abc"), refused(None), refused(object(list!)))
+    end'''
+    assert run(source, evaluator, optimizing) == 'refused refused refused refused\nrefused refused refused set\n'
+
+
+@pytest.mark.parametrize('evaluator', EVALUATORS)
+def test_setattr_in_one_context_is_not_seen_in_another(evaluator):
+    source = '''do
+        let a = 2.add(3)
+        try a.setattr("add", def (x) "hijacked") except None
+        let t = 5.gt(1)
+        try t.setattr("x", "leak") except None
+        let n = 4
+        print(5.add(1), n.add(1), try 2.gt(1).x except "no x")
+    end'''
+    interp = Interpreter(evaluator)
+    outputs = []
+    for _ in range(2):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            interp.context().run(source)
+        outputs.append(output.getvalue())
+    assert outputs == ['6 5 no x\n'] * 2
+
+
+@pytest.mark.parametrize('evaluator', EVALUATORS)
+def test_call_site_sees_each_receiver_type(evaluator):
+    source = '''do
+        let size = def (x) x.len!
+        let values = list(list(1, 2, 3), "ab", range(0, 5), "abcd")
+        let count = def (n) sum(range(0, 2000).map(def (i) size(values.get(i.mod(4)))))
+        let pool = loadex("pyre.exts.threading").pool(4)
+        print(pool.map(count, range(0, 4)))
+        pool.shutdown!
+    end'''
+    assert run(source, evaluator) == '(7000, 7000, 7000, 7000)\n'
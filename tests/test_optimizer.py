@@ -0,0 +1,77 @@
+import glob
+import io
+import os
+
+import pytest
+
+from support import EVALUATORS, ROOT, run
+from pyre import runtime
+from pyre.interpreter import Interpreter
+
+PROGRAMS = sorted(glob.glob(os.path.join(ROOT, 'benchmarks', '*.pyr')))
+
+# Examples that read their input, with the input to give them.
+INTERACTIVE = {
+    'justify.pyr': 'the quick brown fox jumps over the lazy dog, then naps in the sun for a while\n'
+}
+
+SNIPPETS = [
+    'print(2.add(3).mul(4), "ab".concat("cd").rep(2), 1.div(4), 10.sub(20))',
+    'print("x".concat("y").len!, 3.gt(2), 3.equals(3.0), "abc".len!)',
+    '''do
+        let n = 1000.mul(1000)
+        let s = "a".concat("b")
+        print(n, s, try n.setattr("tag", "folded") except "refused", try s.setattr("tag", "folded") except "refused")
+    end''',
+    '''do
+        let a = 2.add(3)
+        let n = 4
+        let t = 5.gt(1)
+        print(try a.setattr("add", def (x) "hijacked") except "refused", try t.setattr("x", "leak") except "refused")
+        print(4.add(1), 5.add(1), n.add(1), 2.add(3).add(1), try 2.gt(1).x except "no x")
+    end''',
+    '''do
+        let f = def (x) x.mul(2).add(1)
+        print(range(0, 5).map(f), sum(range(0, 5).map(f)), try 1.div(0) except "failed")
+    end'''
+]
+
+
+def _both_ways(source, evaluator):
+    return run(source, evaluator, True), run(source, evaluator, False)
+
+
+@pytest.mark.parametrize('evaluator', EVALUATORS)
+@pytest.mark.parametrize('filename', PROGRAMS, ids=os.path.basename)
+def test_benchmarks_print_the_same_optimized(filename, evaluator):
+    with open(filename) as f:
+        optimized, plain = _both_ways(f.read(), evaluator)
+    assert optimized == plain
+
+
+@pytest.mark.parametrize('evaluator', EVALUATORS)
+@pytest.mark.parametrize('name', sorted(INTERACTIVE))
+def test_examples_print_the_same_optimized(name, evaluator, monkeypatch):
+    with open(os.path.join(ROOT, 'examples', name)) as f:
+        source = f.read()
+    outputs = []
+    for optimizing in (True, False):
+        monkeypatch.setattr('sys.stdin', io.StringIO(INTERACTIVE[name]))
+        outputs.append(run(source, evaluator, optimizing))
+    assert outputs[0] == outputs[1]
+
+
+@pytest.mark.parametrize('evaluator', EVALUATORS)
+@pytest.mark.parametrize('source', SNIPPETS)
+def test_snippets_print_the_same_optimized(source, evaluator):
+    optimized, plain = _both_ways(source, evaluator)
+    assert optimized == plain
+
+
+@pytest.mark.parametrize('optimizing', (True, False))
+def test_eval_and_import_use_the_interpreter_setting(optimizing, monkeypatch):
+    optimized = []
+    monkeypatch.setattr(runtime, 'optimize', lambda tree: optimized.append(tree) or tree)
+    Interpreter('ast', optimizing).context().run('eval("1.add(2)")')
+    # The program itself, then the one given to eval.
+    assert len(optimized) == (2 if optimizing else 0)
@@ -0,0 +1,33 @@
+import glob
+import os
+
+import pytest
+
+from support import ROOT
+from pyre.parser import parse
+from pyre.rdparser import conformance, same_tree, parse as rd_parse
+
+SOURCES = sorted(
+    glob.glob(os.path.join(ROOT, 'examples', '*.pyr')) +
+    glob.glob(os.path.join(ROOT, 'src', 'pyre', 'stdlib', '*.pyr')) +
+    glob.glob(os.path.join(ROOT, 'benchmarks', '*.pyr')))
+
+
+@pytest.mark.parametrize('filename', SOURCES, ids=os.path.basename)
+def test_parsers_agree(filename):
+    with open(filename) as f:
+        source = f.read()
+    assert same_tree(rd_parse(source), parse(source, 'funcparserlib'))
+
+
+def test_hash_in_string_is_not_a_comment():
+    source = 'print("a # b") # c'
+    assert conformance(source)
+    assert same_tree(parse(source, 'funcparserlib'), parse('print("a # b")', 'funcparserlib'))
+
+
+def test_source_both_parsers_reject_conforms():
+    assert conformance('print(')
+    assert conformance('x ) (')
+    # A string the funcparserlib tokenizer once ended early, at the '#'.
+    assert conformance('"a #"')
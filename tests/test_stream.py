@@ -0,0 +1,40 @@
+from contextlib import redirect_stdout
+import io
+
+import pytest
+
+from support import EVALUATORS
+from pyre.interpreter import Interpreter
+from pyre.rdparser import parse_stream
+
+
+def _yielded_after(lines):
+    """For each expression parse_stream yields, how many lines it had read."""
+    read = []
+
+    def source():
+        for line in lines:
+            read.append(line)
+            yield line
+    return [len(read) for _ in parse_stream(source())]
+
+
+def test_expression_ending_with_a_block_is_yielded_at_once():
+    lines = ['do\n', '  print(1)\n', 'end\n', 'let f = def (x) do x end\n', 'if x do y end\n', 'while x do y end\n']
+    # The if could still be given an else, so it waits for the end of the input.
+    assert _yielded_after(lines) == [3, 4, 6, 6]
+
+
+def test_expression_that_could_continue_waits_for_the_next_line():
+    lines = ['print(1)\n', '(2)\n', 'print(3)\n', '\n', 'if x do y end\n', 'else z\n']
+    # print(1) is continued by the call on the next line; print(3) ends at the blank line.
+    assert _yielded_after(lines) == [3, 4, 6]
+
+
+@pytest.mark.parametrize('evaluator', EVALUATORS)
+def test_streamed_program_runs_each_expression(evaluator):
+    source = 'do\n  let x = 2\nend\nprint(x)\nif x.equals(2) print("two")\nelse print("other")\n'
+    output = io.StringIO()
+    with redirect_stdout(output):
+        Interpreter(evaluator).context().run_stream(io.StringIO(source))
+    assert output.getvalue() == '2\ntwo\n'
@@ -0,0 +1,20 @@
+import pytest
+
+from support import EVALUATORS, run
+
+SETTINGS = '''do
+    let th = loadex("pyre.exts.threading")
+    let settings = def () loadex("pyre.exts.pyinterop").pyeval("__import__('pyre.runtime').runtime.current_settings()[:2]")
+    let procs = th.processes(1)
+    let pool = th.pool(1)
+    print(procs.submit(settings).result!, pool.submit(settings).result!, th.spawn(settings).join!)
+    procs.shutdown!
+    pool.shutdown!
+end'''
+
+
+@pytest.mark.parametrize('evaluator', EVALUATORS)
+@pytest.mark.parametrize('optimizing', (True, False))
+def test_workers_use_the_settings_of_their_creator(evaluator, optimizing):
+    expected = str((evaluator, int(optimizing)))
+    assert run(SETTINGS, evaluator, optimizing) == '%s %s %s\n' % (expected, expected, expected)
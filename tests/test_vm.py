@@ -0,0 +1,35 @@
+from support import EVALUATORS, run
+import pytest
+
+BREAK_THROUGH_CALL = '''do
+    let stop = def () break
+    let mut n = 0
+    while True do
+        let n = n.add(1)
+        if n.equals(3) stop!
+    end
+    print(n)
+    for i in range(0, 10) do
+        print(i)
+        if i.equals(1) stop!
+    end
+end'''
+
+
+@pytest.mark.parametrize('evaluator', EVALUATORS)
+def test_break_escaping_a_call_ends_the_loop(evaluator):
+    assert run(BREAK_THROUGH_CALL, evaluator) == '3\n0\n1\n'
+
+
+def test_evaluators_agree_on_control_flow():
+    source = '''do
+        let f = def (x) do
+            for i in range(0, x) do
+                if i.equals(2) return i.mul(10)
+            end
+            0
+        end
+        print(f(5), f(1))
+        try error("boom") except print("caught")
+    end'''
+    assert run(source, 'ast') == run(source, 'vm')